@@ -5,23 +5,39 @@ FastAPI server that never sees plaintext transactions
 """
 
 import os
-from fastapi import FastAPI, HTTPException, status
+import cbor2
+import orjson
+from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from typing import List
 import uvicorn
 
-from .models import (
-    CompanyRegistration, TransactionCreate, BuyerSignRequest,
-    ShareCreate, GroupShareCreate, Transaction, ShareRecord
-)
+from .models import CompanyRegistration, ShareCreate, GroupShareCreate
 from .db import Database
 
 app = FastAPI(
     title="ChainOfProduct Application Server",
     description="Secure transaction storage in the DMZ",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+@app.exception_handler(HTTPException)
+async def orjson_http_exception_handler(request: Request, exc: HTTPException):
+    """Encode error responses with orjson too, not just route returns"""
+    return ORJSONResponse(
+        {"detail": exc.detail},
+        status_code=exc.status_code,
+        headers=exc.headers
+    )
+
+
+# Compress larger JSON payloads (protected documents are base64-heavy
+# and compress well)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # CORS middleware (configure appropriately for production)
 app.add_middleware(
     CORSMiddleware,
@@ -39,8 +55,20 @@ if not db_url:
 db = Database(db_url)
 
 
+@app.on_event("startup")
+async def startup():
+    """Open the async connection pool and initialize the schema"""
+    await db.connect()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Close the async connection pool"""
+    await db.close()
+
+
 @app.get("/")
-def root():
+async def root():
     """Health check endpoint"""
     return {
         "service": "ChainOfProduct Application Server",
@@ -50,29 +78,27 @@ def root():
 
 
 @app.post("/register_company", status_code=status.HTTP_201_CREATED)
-def register_company(registration: CompanyRegistration):
+async def register_company(registration: CompanyRegistration):
     """
     Register a new company with public keys
     """
     try:
-        # Check if company already exists
-        existing = db.get_company(registration.company_name)
-        if existing:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f"Company {registration.company_name} already registered"
-            )
-        
-        # Register company
-        company_id = db.register_company(
+        # Atomic insert; None means the name was already taken
+        row = await db.register_company(
             registration.company_name,
             registration.signing_public_key,
             registration.encryption_public_key
         )
-        
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Company {registration.company_name} already registered"
+            )
+
         return {
-            "id": company_id,
+            "id": row["id"],
             "company_name": registration.company_name,
+            "created_at": row["created_at"],
             "message": "Company registered successfully"
         }
         
@@ -86,10 +112,10 @@ def register_company(registration: CompanyRegistration):
 
 
 @app.get("/companies")
-def list_companies():
+async def list_companies():
     """List all registered companies"""
     try:
-        companies = db.list_companies()
+        companies = await db.list_companies()
         return {"companies": companies}
     except Exception as e:
         raise HTTPException(
@@ -99,10 +125,10 @@ def list_companies():
 
 
 @app.get("/companies/{company_name}")
-def get_company(company_name: str):
+async def get_company(company_name: str):
     """Get company public keys"""
     try:
-        company = db.get_company(company_name)
+        company = await db.get_company(company_name)
         if not company:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -119,14 +145,42 @@ def get_company(company_name: str):
 
 
 @app.post("/transactions", status_code=status.HTTP_201_CREATED)
-def create_transaction(transaction: TransactionCreate):
+async def create_transaction(request: Request):
     """
     Store a protected transaction
     Server never sees plaintext - only encrypted data
+
+    JSON bodies are parsed with orjson directly (hot path); the expected
+    shape matches models.TransactionCreate. Clients may instead POST the
+    protected document itself as application/cbor, which is stored
+    verbatim alongside the JSONB copy
     """
     try:
-        protected_doc = transaction.protected_document
-        
+        raw = await request.body()
+        is_cbor = request.headers.get("content-type", "").startswith("application/cbor")
+        if is_cbor:
+            try:
+                protected_doc = cbor2.loads(raw)
+            except Exception:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Request body is not valid CBOR"
+                )
+        else:
+            try:
+                body = orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Request body is not valid JSON"
+                )
+            protected_doc = body.get("protected_document")
+        if not isinstance(protected_doc, dict):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Request body missing protected_document"
+            )
+
         # Extract metadata from protected document
         transaction_id = protected_doc.get("transaction_id")
         if not transaction_id:
@@ -134,26 +188,33 @@ def create_transaction(transaction: TransactionCreate):
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Protected document missing transaction_id"
             )
+
+        # The buyer-sign path writes into signatures via jsonb_set,
+        # which cannot create the parent object; reject documents that
+        # could never be signed
+        if not isinstance(protected_doc.get("signatures"), dict):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Protected document missing signatures object"
+            )
         
-        # Extract seller and buyer from signatures
-        seller = protected_doc.get("signatures", {}).get("seller", {}).get("company")
-        buyer_sig = protected_doc.get("signatures", {}).get("buyer")
-        buyer = buyer_sig.get("company") if buyer_sig else None
-        
-        # Check if transaction already exists
-        existing = db.get_transaction(transaction_id)
-        if existing:
+        # Store transaction; atomic insert, None means the id already
+        # exists. seller/buyer are derived inside Postgres from the
+        # document's signature blocks (generated columns)
+        if is_cbor:
+            row = await db.create_transaction_binary(transaction_id, protected_doc, raw)
+        else:
+            row = await db.create_transaction(transaction_id, protected_doc)
+        if row is None:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail=f"Transaction {transaction_id} already exists"
             )
-        
-        # Store transaction
-        db_id = db.create_transaction(transaction_id, protected_doc, seller, buyer)
-        
+
         return {
-            "id": db_id,
+            "id": row["id"],
             "transaction_id": transaction_id,
+            "created_at": row["created_at"],
             "message": "Transaction stored successfully"
         }
         
@@ -167,25 +228,30 @@ def create_transaction(transaction: TransactionCreate):
 
 
 @app.get("/transactions/{transaction_id}")
-def get_transaction(transaction_id: int):
+async def get_transaction(transaction_id: int, request: Request):
     """
     Retrieve a protected transaction
     Returns encrypted data only
     """
     try:
-        transaction = db.get_transaction(transaction_id)
-        if not transaction:
+        # Single round-trip: transaction plus both share record sets
+        bundle = await db.get_transaction_bundle(transaction_id)
+        if not bundle:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Transaction {transaction_id} not found"
             )
-        
-        # Get share records
-        share_records = db.get_share_records(transaction_id)
-        group_share_records = db.get_group_share_records(transaction_id)
-        
+
+        share_records = bundle.pop("share_records")
+        group_share_records = bundle.pop("group_share_records")
+
+        # Binary fast path: return the stored CBOR document verbatim
+        blob = bundle.pop("protected_document_bin", None)
+        if blob is not None and "application/cbor" in request.headers.get("accept", ""):
+            return Response(content=bytes(blob), media_type="application/cbor")
+
         return {
-            "transaction": transaction,
+            "transaction": bundle,
             "share_records": share_records,
             "group_share_records": group_share_records
         }
@@ -199,39 +265,99 @@ def get_transaction(transaction_id: int):
         )
 
 
+@app.post("/transactions/bulk")
+async def get_transactions_bulk(request: Request):
+    """
+    Retrieve many protected transactions in one request
+    Body: {"ids": [..]}; the response maps each found id to the same
+    shape GET /transactions/{id} returns
+    """
+    try:
+        try:
+            body = orjson.loads(await request.body())
+        except orjson.JSONDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Request body is not valid JSON"
+            )
+        ids = body.get("ids")
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Request body must contain an integer id list"
+            )
+
+        bundles = await db.get_transaction_bundles(ids)
+
+        transactions = {}
+        for transaction_id, bundle in bundles.items():
+            share_records = bundle.pop("share_records")
+            group_share_records = bundle.pop("group_share_records")
+            bundle.pop("protected_document_bin", None)
+            transactions[transaction_id] = {
+                "transaction": bundle,
+                "share_records": share_records,
+                "group_share_records": group_share_records
+            }
+
+        return {
+            "transactions": transactions,
+            "count": len(transactions)
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve transactions: {str(e)}"
+        )
+
+
 @app.post("/transactions/{transaction_id}/buyer_sign")
-def buyer_sign_transaction(transaction_id: int, request: BuyerSignRequest):
+async def buyer_sign_transaction(transaction_id: int, request: Request):
     """
     Add buyer signature to a transaction
+
+    The body is parsed with orjson directly (hot path); the expected
+    shape matches models.BuyerSignRequest
     """
     try:
-        # Get existing transaction
-        transaction = db.get_transaction(transaction_id)
-        if not transaction:
+        try:
+            body = orjson.loads(await request.body())
+        except orjson.JSONDecodeError:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Transaction {transaction_id} not found"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Request body is not valid JSON"
             )
-        
-        # Check if already signed
-        if transaction.get("buyer_signed"):
+        buyer_signature = body.get("buyer_signature")
+        if not isinstance(buyer_signature, dict):
             raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Transaction already signed by buyer"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Request body missing buyer_signature"
             )
-        
-        # Update protected document with buyer signature
-        protected_doc = transaction["protected_document"]
-        protected_doc["signatures"]["buyer"] = request.buyer_signature
-        
-        # Update in database
-        success = db.update_transaction_buyer_signature(transaction_id, protected_doc)
-        if not success:
+
+        # Single statement: the document is mutated inside Postgres
+        updated = await db.set_buyer_signature(transaction_id, buyer_signature)
+
+        if not updated:
+            # Distinguish "not found", "already signed" and "unsignable"
+            transaction = await db.get_transaction_meta(transaction_id)
+            if not transaction:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Transaction {transaction_id} not found"
+                )
+            if transaction["buyer_signed"]:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Transaction already signed by buyer"
+                )
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to update transaction"
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Transaction document has no signatures object"
             )
-        
+
         return {
             "transaction_id": transaction_id,
             "message": "Buyer signature added successfully"
@@ -247,14 +373,14 @@ def buyer_sign_transaction(transaction_id: int, request: BuyerSignRequest):
 
 
 @app.post("/transactions/{transaction_id}/share")
-def share_transaction(transaction_id: int, share: ShareCreate):
+async def share_transaction(transaction_id: int, share: ShareCreate):
     """
     Record that a transaction was shared with someone
     Creates an auditable share record (SR4: Integrity 2)
     """
     try:
         # Verify transaction exists
-        transaction = db.get_transaction(transaction_id)
+        transaction = await db.get_transaction_meta(transaction_id)
         if not transaction:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -262,18 +388,19 @@ def share_transaction(transaction_id: int, share: ShareCreate):
             )
         
         # Create share record
-        record_id = db.create_share_record(
+        record = await db.create_share_record(
             transaction_id,
             share.shared_by,
             share.shared_with,
             share.signature
         )
-        
+
         return {
-            "id": record_id,
+            "id": record["id"],
             "transaction_id": transaction_id,
             "shared_by": share.shared_by,
             "shared_with": share.shared_with,
+            "timestamp": record["timestamp"],
             "message": "Share record created"
         }
         
@@ -286,14 +413,50 @@ def share_transaction(transaction_id: int, share: ShareCreate):
         )
 
 
+@app.post("/transactions/{transaction_id}/shares:bulk")
+async def share_transaction_bulk(transaction_id: int, shares: List[ShareCreate]):
+    """
+    Record many shares of a transaction in one request
+    All records are inserted in a single database round-trip
+    """
+    try:
+        # Verify transaction exists
+        transaction = await db.get_transaction_meta(transaction_id)
+        if not transaction:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Transaction {transaction_id} not found"
+            )
+
+        records = await db.create_share_records_bulk(
+            transaction_id,
+            [(share.shared_by, share.shared_with, share.signature) for share in shares]
+        )
+
+        return {
+            "ids": [record["id"] for record in records],
+            "transaction_id": transaction_id,
+            "count": len(records),
+            "message": "Share records created"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create share records: {str(e)}"
+        )
+
+
 @app.post("/transactions/{transaction_id}/share_group")
-def share_transaction_group(transaction_id: int, share: GroupShareCreate):
+async def share_transaction_group(transaction_id: int, share: GroupShareCreate):
     """
     Record that a transaction was shared with a group
     """
     try:
         # Verify transaction exists
-        transaction = db.get_transaction(transaction_id)
+        transaction = await db.get_transaction_meta(transaction_id)
         if not transaction:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -301,18 +464,19 @@ def share_transaction_group(transaction_id: int, share: GroupShareCreate):
             )
         
         # Create group share record
-        record_id = db.create_group_share_record(
+        record = await db.create_group_share_record(
             transaction_id,
             share.shared_by,
             share.group_id,
             share.signature
         )
-        
+
         return {
-            "id": record_id,
+            "id": record["id"],
             "transaction_id": transaction_id,
             "shared_by": share.shared_by,
             "group_id": share.group_id,
+            "timestamp": record["timestamp"],
             "message": "Group share record created"
         }
         
@@ -325,14 +489,57 @@ def share_transaction_group(transaction_id: int, share: GroupShareCreate):
         )
 
 
+@app.post("/shares:copy", status_code=status.HTTP_201_CREATED)
+async def copy_shares(request: Request):
+    """
+    Bulk-ingest share records as NDJSON (one JSON object per line)
+    The request body streams straight into Postgres via the COPY protocol
+    """
+    try:
+        async def rows():
+            buffer = b""
+            async for chunk in request.stream():
+                buffer += chunk
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    if line.strip():
+                        yield _share_row(orjson.loads(line))
+            if buffer.strip():
+                yield _share_row(orjson.loads(buffer))
+
+        count = await db.copy_share_records(rows())
+
+        return {
+            "count": count,
+            "message": "Share records ingested"
+        }
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to ingest share records: {str(e)}"
+        )
+
+
+def _share_row(record: dict) -> tuple:
+    """Map an NDJSON share record to a share_records COPY row"""
+    return (
+        record["transaction_id"],
+        record["shared_by"],
+        record["shared_with"],
+        record.get("share_type", "individual"),
+        record["signature"]
+    )
+
+
 @app.get("/transactions/{transaction_id}/shares")
-def get_shares(transaction_id: int):
+async def get_shares(transaction_id: int):
     """
     Get all share records for a transaction
     Allows seller to verify who buyer shared with (SR4)
     """
     try:
-        records = db.get_share_records(transaction_id)
+        records = await db.get_share_records(transaction_id)
         return {"share_records": records}
     except Exception as e:
         raise HTTPException(
@@ -342,12 +549,12 @@ def get_shares(transaction_id: int):
 
 
 @app.get("/transactions/{transaction_id}/group_shares")
-def get_group_shares(transaction_id: int):
+async def get_group_shares(transaction_id: int):
     """
     Get all group share records for a transaction
     """
     try:
-        records = db.get_group_share_records(transaction_id)
+        records = await db.get_group_share_records(transaction_id)
         return {"group_share_records": records}
     except Exception as e:
         raise HTTPException(
@@ -357,8 +564,10 @@ def get_group_shares(transaction_id: int):
 
 
 def start_server(host: str = "0.0.0.0", port: int = 8001):
-    """Start the application server"""
-    uvicorn.run(app, host=host, port=port)
+    """Start the application server (multi-worker, uvloop + httptools)"""
+    uvicorn.run("app.main:app", host=host, port=port,
+                workers=int(os.getenv("WEB_CONCURRENCY", "4")),
+                loop="uvloop", http="httptools", log_level="warning")
 
 
 if __name__ == "__main__":
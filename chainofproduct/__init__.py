@@ -2,9 +2,17 @@
 chainofproduct/__init__.py
 """
 
-from . import crypto
-from . import keymanager
-from . import library
+import importlib
 
 __version__ = "1.0.0"
 __all__ = ["crypto", "keymanager", "library"]
+
+
+def __getattr__(name):
+    # Lazy submodule loading (PEP 562): CLI invocations that never touch
+    # crypto (e.g. `cop --help`) skip the cryptography/OpenSSL import cost
+    if name in __all__:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
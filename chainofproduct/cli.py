@@ -3,12 +3,36 @@ chainofproduct/cli.py
 Command-line interface for ChainOfProduct operations
 """
 
+import os
 import sys
 import json
 import argparse
+import orjson
 from pathlib import Path
-from .library import protect, check, unprotect, buyer_sign
-from .keymanager import KeyManager, PublicKeyStore
+
+# .library (and through it, the cryptography bindings) is imported
+# lazily inside each command so `cop --help` doesn't pay the ~100ms
+# OpenSSL startup cost
+
+
+def _read_json(path: str) -> dict:
+    """Read and parse a JSON document in a single filesystem read"""
+    return orjson.loads(Path(path).read_bytes())
+
+
+def _write_json(path: str, obj: dict) -> None:
+    """
+    Serialize and write a JSON document with one write syscall,
+    atomically (temp file + rename) so readers never see a partial file
+    """
+    data = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
 
 
 def print_error(message: str, details: str = None):
@@ -20,10 +44,12 @@ def print_error(message: str, details: str = None):
 
 def cmd_protect(args):
     """Protect a transaction"""
+    from .library import protect
+    from .keymanager import KeyManager, PublicKeyStore
+
     try:
         # Load transaction
-        with open(args.input, 'r') as f:
-            transaction = json.load(f)
+        transaction = _read_json(args.input)
         
         # Initialize key manager and public key store
         key_manager = KeyManager()
@@ -54,8 +80,7 @@ def cmd_protect(args):
         )
         
         # Save protected document
-        with open(args.output, 'w') as f:
-            json.dump(protected_doc, f, indent=2)
+        _write_json(args.output, protected_doc)
         
         print(f"✓ Transaction protected successfully")
         print(f"  Output: {args.output}")
@@ -78,10 +103,12 @@ def cmd_protect(args):
 
 def cmd_check(args):
     """Check a protected document"""
+    from .library import check
+    from .keymanager import PublicKeyStore
+
     try:
         # Load protected document
-        with open(args.input, 'r') as f:
-            protected_doc = json.load(f)
+        protected_doc = _read_json(args.input)
         
         # Initialize public key store
         public_key_store = PublicKeyStore()
@@ -124,10 +151,12 @@ def cmd_check(args):
 
 def cmd_unprotect(args):
     """Unprotect a document"""
+    from .library import unprotect
+    from .keymanager import KeyManager
+
     try:
         # Load protected document
-        with open(args.input, 'r') as f:
-            protected_doc = json.load(f)
+        protected_doc = _read_json(args.input)
         
         # Initialize key manager
         key_manager = KeyManager()
@@ -136,8 +165,7 @@ def cmd_unprotect(args):
         result = unprotect(protected_doc, args.company, key_manager)
         
         # Save decrypted transaction
-        with open(args.output, 'w') as f:
-            json.dump(result["transaction"], f, indent=2)
+        _write_json(args.output, result["transaction"])
         
         print(f"✓ Document decrypted successfully")
         print(f"  Output: {args.output}")
@@ -159,15 +187,17 @@ def cmd_unprotect(args):
 
 def cmd_keygen(args):
     """Generate keys for a company"""
+    from .keymanager import KeyManager, PublicKeyStore
+
     try:
         key_manager = KeyManager()
         public_key_store = PublicKeyStore()
         
-        # Generate keys
-        public_keys = key_manager.generate_company_keys(args.company)
-        
-        # Store in public key store
-        public_key_store.add_company(public_keys)
+        # Generate keys and store them; the batching context defers the
+        # store rewrite to a single write
+        with public_key_store:
+            public_keys = key_manager.generate_company_keys(args.company)
+            public_key_store.add_company(public_keys)
         
         print(f"✓ Keys generated for {args.company}")
         print(f"  Private keys stored in: keys/{args.company}/")
@@ -182,10 +212,12 @@ def cmd_keygen(args):
 
 def cmd_buyer_sign(args):
     """Add buyer signature to protected document"""
+    from .library import buyer_sign
+    from .keymanager import KeyManager
+
     try:
         # Load protected document
-        with open(args.input, 'r') as f:
-            protected_doc = json.load(f)
+        protected_doc = _read_json(args.input)
         
         # Initialize key manager
         key_manager = KeyManager()
@@ -194,8 +226,7 @@ def cmd_buyer_sign(args):
         updated_doc = buyer_sign(protected_doc, args.buyer, key_manager)
         
         # Save
-        with open(args.output, 'w') as f:
-            json.dump(updated_doc, f, indent=2)
+        _write_json(args.output, updated_doc)
         
         print(f"✓ Buyer signature added successfully")
         print(f"  Output: {args.output}")
@@ -224,48 +255,41 @@ def main():
     protect_parser.add_argument('--groups', help='Comma-separated list of group IDs')
     protect_parser.add_argument('--group-server', default='http://localhost:8002',
                                help='Group server URL')
+    protect_parser.set_defaults(func=cmd_protect)
     
     # Check command
     check_parser = subparsers.add_parser('check', help='Verify a protected document')
     check_parser.add_argument('input', help='Protected document file')
+    check_parser.set_defaults(func=cmd_check)
     
     # Unprotect command
     unprotect_parser = subparsers.add_parser('unprotect', help='Decrypt a protected document')
     unprotect_parser.add_argument('input', help='Protected document file')
     unprotect_parser.add_argument('company', help='Company name to decrypt as')
     unprotect_parser.add_argument('output', help='Output decrypted transaction file')
+    unprotect_parser.set_defaults(func=cmd_unprotect)
     
     # Keygen command
     keygen_parser = subparsers.add_parser('keygen', help='Generate keys for a company')
     keygen_parser.add_argument('company', help='Company name')
+    keygen_parser.set_defaults(func=cmd_keygen)
     
     # Buyer-sign command
     buyer_sign_parser = subparsers.add_parser('buyer-sign', help='Add buyer signature')
     buyer_sign_parser.add_argument('input', help='Protected document file')
     buyer_sign_parser.add_argument('buyer', help='Buyer company name')
     buyer_sign_parser.add_argument('output', help='Output signed document file')
+    buyer_sign_parser.set_defaults(func=cmd_buyer_sign)
     
-    # Parse arguments
+    # Parse arguments and dispatch via the subparser-bound handler
     args = parser.parse_args()
     
-    if not args.command:
+    func = getattr(args, 'func', None)
+    if func is None:
         parser.print_help()
         return 0
     
-    # Execute command
-    if args.command == 'protect':
-        return cmd_protect(args)
-    elif args.command == 'check':
-        return cmd_check(args)
-    elif args.command == 'unprotect':
-        return cmd_unprotect(args)
-    elif args.command == 'keygen':
-        return cmd_keygen(args)
-    elif args.command == 'buyer-sign':
-        return cmd_buyer_sign(args)
-    else:
-        parser.print_help()
-        return 1
+    return func(args)
 
 
 if __name__ == '__main__':
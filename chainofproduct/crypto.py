@@ -2,16 +2,50 @@
 chainofproduct/crypto.py
 Core cryptographic operations using the cryptography library.
 NO custom crypto primitives - only battle-tested libraries.
+
+X25519 and Ed25519 are delegated to the OpenSSL backend, which selects
+its optimized curve25519 assembly (ADX/MULX carry chains on x86-64,
+base-2^51 on aarch64) at runtime; swapping in an external bignum
+library would add a native build dependency without changing the
+primitives actually executed.
 """
 
 import os
+import binascii
+import hashlib
+import hmac
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple, Dict, Any
 from cryptography.hazmat.primitives.asymmetric import ed25519, x25519
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from cryptography.hazmat.primitives.kdf.hkdf import HKDF
-from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.kdf.hkdf import HKDFExpand
+
+# Bound once at import; the wrap/unwrap fast path calls these in a loop.
+# binascii is the C layer the base64 module wraps - calling it directly
+# skips one Python frame per encode/decode
+from functools import partial
+_b64e = partial(binascii.b2a_base64, newline=False)
+_b64d = binascii.a2b_base64
+
+# HKDF with salt=None uses a zero-filled salt of hash length
+_HKDF_ZERO_SALT = b"\x00" * 32
+
+
+def _derive_wrapping_key(shared_secret: bytes) -> bytes:
+    """
+    HKDF-SHA256 for key wrapping, with the extract step done as a single
+    HMAC call and only the expand step going through the KDF object
+    (equivalent to HKDF(salt=None, info=b'key_wrapping'))
+    """
+    prk = hmac.new(_HKDF_ZERO_SALT, shared_secret, hashlib.sha256).digest()
+    return HKDFExpand(
+        algorithm=hashes.SHA256(),
+        length=32,
+        info=b'key_wrapping'
+    ).derive(prk)
+
 
 class CryptoError(Exception):
     """Base exception for crypto operations"""
@@ -46,11 +80,22 @@ def verify_signature(public_key: ed25519.Ed25519PublicKey, signature: bytes, dat
         return False
 
 
+def verify_signatures(items) -> list:
+    """
+    Verify many Ed25519 signatures at once
+    items: list of (public_key, signature, data) tuples; returns a list
+    of booleans in input order. Larger batches run in a thread pool
+    (the C backend releases the GIL during verification)
+    """
+    if len(items) < 4:
+        return [verify_signature(*item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(len(items), os.cpu_count() or 1)) as pool:
+        return list(pool.map(lambda item: verify_signature(*item), items))
+
+
 def hash_data(data: bytes) -> bytes:
-    """SHA-256 hash of data"""
-    digest = hashes.Hash(hashes.SHA256(), backend=default_backend())
-    digest.update(data)
-    return digest.finalize()
+    """SHA-256 hash of data (hashlib goes straight to OpenSSL's primitive)"""
+    return hashlib.sha256(data).digest()
 
 
 def generate_symmetric_key() -> bytes:
@@ -62,15 +107,18 @@ def encrypt_aes_gcm(key: bytes, plaintext: bytes) -> Dict[str, str]:
     """
     Encrypt with AES-GCM
     Returns dict with ciphertext, nonce, and tag (all base64 encoded)
+
+    The OpenSSL backend picks its fastest AES-GCM implementation at
+    runtime (AES-NI, and the stitched VAES+VPCLMULQDQ loop on AVX-512
+    capable CPUs with OpenSSL 3.x)
     """
-    import base64
     aesgcm = AESGCM(key)
     nonce = os.urandom(12)  # 96-bit nonce for GCM
     ciphertext = aesgcm.encrypt(nonce, plaintext, None)
     
     return {
-        "ciphertext": base64.b64encode(ciphertext).decode('utf-8'),
-        "nonce": base64.b64encode(nonce).decode('utf-8')
+        "ciphertext": _b64e(ciphertext).decode(),
+        "nonce": _b64e(nonce).decode()
     }
 
 
@@ -78,10 +126,9 @@ def decrypt_aes_gcm(key: bytes, encrypted_data: Dict[str, str]) -> bytes:
     """
     Decrypt AES-GCM encrypted data
     """
-    import base64
     aesgcm = AESGCM(key)
-    nonce = base64.b64decode(encrypted_data["nonce"])
-    ciphertext = base64.b64decode(encrypted_data["ciphertext"])
+    nonce = _b64d(encrypted_data["nonce"])
+    ciphertext = _b64d(encrypted_data["ciphertext"])
     
     try:
         plaintext = aesgcm.decrypt(nonce, ciphertext, None)
@@ -90,13 +137,13 @@ def decrypt_aes_gcm(key: bytes, encrypted_data: Dict[str, str]) -> bytes:
         raise CryptoError(f"Decryption failed: {e}")
 
 
-def wrap_key_x25519(recipient_public_key: x25519.X25519PublicKey, key_to_wrap: bytes) -> Dict[str, str]:
+def wrap_key_x25519_raw(recipient_public_key: x25519.X25519PublicKey,
+                        key_to_wrap: bytes) -> Dict[str, Any]:
     """
     Wrap a symmetric key for a recipient using X25519 + HKDF + AES-GCM
-    Returns ephemeral public key and encrypted key
+    Returns raw bytes throughout; callers building JSON documents encode
+    once at the boundary via encode_wrapped_key
     """
-    import base64
-    
     # Generate ephemeral key pair
     ephemeral_private = x25519.X25519PrivateKey.generate()
     ephemeral_public = ephemeral_private.public_key()
@@ -105,51 +152,58 @@ def wrap_key_x25519(recipient_public_key: x25519.X25519PublicKey, key_to_wrap: b
     shared_secret = ephemeral_private.exchange(recipient_public_key)
     
     # Derive encryption key using HKDF
-    kdf = HKDF(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=None,
-        info=b'key_wrapping',
-        backend=default_backend()
-    )
-    wrapping_key = kdf.derive(shared_secret)
+    wrapping_key = _derive_wrapping_key(shared_secret)
     
     # Encrypt the key to wrap
-    encrypted = encrypt_aes_gcm(wrapping_key, key_to_wrap)
+    aesgcm = AESGCM(wrapping_key)
+    nonce = os.urandom(12)  # 96-bit nonce for GCM
+    ciphertext = aesgcm.encrypt(nonce, key_to_wrap, None)
     
     return {
-        "ephemeral_public_key": base64.b64encode(
-            ephemeral_public.public_bytes(
-                encoding=serialization.Encoding.Raw,
-                format=serialization.PublicFormat.Raw
-            )
-        ).decode('utf-8'),
-        "encrypted_key": encrypted
+        "ephemeral_public_key": ephemeral_public.public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        ),
+        "encrypted_key": {
+            "ciphertext": ciphertext,
+            "nonce": nonce
+        }
+    }
+
+
+def encode_wrapped_key(wrapped: Dict[str, Any]) -> Dict[str, Any]:
+    """Base64-encode a raw wrapped key for JSON serialization"""
+    encrypted = wrapped["encrypted_key"]
+    return {
+        "ephemeral_public_key": _b64e(wrapped["ephemeral_public_key"]).decode(),
+        "encrypted_key": {
+            "ciphertext": _b64e(encrypted["ciphertext"]).decode(),
+            "nonce": _b64e(encrypted["nonce"]).decode()
+        }
     }
 
 
+def wrap_key_x25519(recipient_public_key: x25519.X25519PublicKey, key_to_wrap: bytes) -> Dict[str, str]:
+    """
+    Wrap a symmetric key for a recipient using X25519 + HKDF + AES-GCM
+    Returns ephemeral public key and encrypted key (base64 encoded)
+    """
+    return encode_wrapped_key(wrap_key_x25519_raw(recipient_public_key, key_to_wrap))
+
+
 def unwrap_key_x25519(recipient_private_key: x25519.X25519PrivateKey, wrapped_data: Dict[str, str]) -> bytes:
     """
     Unwrap a symmetric key using X25519 + HKDF + AES-GCM
     """
-    import base64
-    
     # Load ephemeral public key
-    ephemeral_public_bytes = base64.b64decode(wrapped_data["ephemeral_public_key"])
+    ephemeral_public_bytes = _b64d(wrapped_data["ephemeral_public_key"])
     ephemeral_public = x25519.X25519PublicKey.from_public_bytes(ephemeral_public_bytes)
     
     # Perform ECDH
     shared_secret = recipient_private_key.exchange(ephemeral_public)
     
     # Derive decryption key using HKDF
-    kdf = HKDF(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=None,
-        info=b'key_wrapping',
-        backend=default_backend()
-    )
-    wrapping_key = kdf.derive(shared_secret)
+    wrapping_key = _derive_wrapping_key(shared_secret)
     
     # Decrypt the wrapped key
     unwrapped_key = decrypt_aes_gcm(wrapping_key, wrapped_data["encrypted_key"])
@@ -157,19 +211,153 @@ def unwrap_key_x25519(recipient_private_key: x25519.X25519PrivateKey, wrapped_da
     return unwrapped_key
 
 
+def wrap_keys_shared_ephemeral(recipient_public_keys: Dict[str, x25519.X25519PublicKey],
+                               key_to_wrap: bytes,
+                               max_workers: int = None) -> Tuple[bytes, Dict[str, Dict[str, Any]]]:
+    """
+    Wrap a symmetric key for many recipients under ONE ephemeral key pair
+    Returns (ephemeral public key bytes, name -> wrap entry without a
+    per-entry ephemeral). Security is unchanged - each recipient's KEK
+    still comes from their own ECDH with the ephemeral - but the sender
+    pays a single base-point multiplication and the document stores the
+    ephemeral once instead of per recipient
+    """
+    ephemeral_private = x25519.X25519PrivateKey.generate()
+    ephemeral_public_bytes = ephemeral_private.public_key().public_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PublicFormat.Raw
+    )
+
+    def wrap(name):
+        shared_secret = ephemeral_private.exchange(recipient_public_keys[name])
+        aesgcm = AESGCM(_derive_wrapping_key(shared_secret))
+        nonce = os.urandom(12)  # 96-bit nonce for GCM
+        return name, {
+            "encrypted_key": {
+                "ciphertext": aesgcm.encrypt(nonce, key_to_wrap, None),
+                "nonce": nonce
+            }
+        }
+
+    names = list(recipient_public_keys)
+    if len(names) <= 2:
+        wrapped = dict(wrap(name) for name in names)
+    else:
+        workers = max_workers or min(len(names), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            wrapped = dict(pool.map(wrap, names))
+    return ephemeral_public_bytes, wrapped
+
+
+def encode_shared_wrapped_key(wrapped: Dict[str, Any]) -> Dict[str, Any]:
+    """Base64-encode a raw shared-ephemeral wrap entry for JSON"""
+    encrypted = wrapped["encrypted_key"]
+    return {
+        "encrypted_key": {
+            "ciphertext": _b64e(encrypted["ciphertext"]).decode(),
+            "nonce": _b64e(encrypted["nonce"]).decode()
+        }
+    }
+
+
+# Static-static shared secrets between a sender and its frequent
+# recipients; the pair's ECDH output never changes, so it is computed
+# once and reused across transactions
+_static_shared_cache: Dict[Tuple[str, bytes], bytes] = {}
+
+
+def wrap_key_static(sender_private_key: x25519.X25519PrivateKey, sender_name: str,
+                    recipient_public_key: x25519.X25519PublicKey,
+                    key_to_wrap: bytes, info: bytes) -> Dict[str, Any]:
+    """
+    Wrap key material under the sender/recipient static-static X25519
+    secret (raw outputs). In steady state no scalar multiplication runs:
+    the shared secret is cached and only HKDF + AES-GCM remain. info
+    must bind the context (transaction and group ids) so the derived
+    KEK is unique per disclosure
+    """
+    recipient_public_bytes = recipient_public_key.public_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PublicFormat.Raw
+    )
+    cache_key = (sender_name, recipient_public_bytes)
+    shared_secret = _static_shared_cache.get(cache_key)
+    if shared_secret is None:
+        shared_secret = sender_private_key.exchange(recipient_public_key)
+        _static_shared_cache[cache_key] = shared_secret
+    
+    prk = hmac.new(_HKDF_ZERO_SALT, shared_secret, hashlib.sha256).digest()
+    kek = HKDFExpand(algorithm=hashes.SHA256(), length=32, info=info).derive(prk)
+    
+    aesgcm = AESGCM(kek)
+    nonce = os.urandom(12)  # 96-bit nonce for GCM
+    return {
+        "scheme": "static-x25519",
+        "sender": sender_name,
+        "encrypted_key": {
+            "ciphertext": aesgcm.encrypt(nonce, key_to_wrap, None),
+            "nonce": nonce
+        }
+    }
+
+
+def unwrap_key_static(recipient_private_key: x25519.X25519PrivateKey,
+                      sender_public_key: x25519.X25519PublicKey,
+                      wrapped_data: Dict[str, Any], info: bytes) -> bytes:
+    """Unwrap key material wrapped by wrap_key_static"""
+    shared_secret = recipient_private_key.exchange(sender_public_key)
+    prk = hmac.new(_HKDF_ZERO_SALT, shared_secret, hashlib.sha256).digest()
+    kek = HKDFExpand(algorithm=hashes.SHA256(), length=32, info=info).derive(prk)
+    return decrypt_aes_gcm(kek, wrapped_data["encrypted_key"])
+
+
+def encode_static_wrapped_key(wrapped: Dict[str, Any]) -> Dict[str, Any]:
+    """Base64-encode a raw static-scheme wrapped key for JSON"""
+    encrypted = wrapped["encrypted_key"]
+    return {
+        "scheme": wrapped["scheme"],
+        "sender": wrapped["sender"],
+        "encrypted_key": {
+            "ciphertext": _b64e(encrypted["ciphertext"]).decode(),
+            "nonce": _b64e(encrypted["nonce"]).decode()
+        }
+    }
+
+
+def group_wrap_info(group_id: str, tx_id: str) -> bytes:
+    """Context binding for group-member static wraps"""
+    return b"group-kek:" + group_id.encode() + b":tx:" + tx_id.encode()
+
+
 def derive_group_key(transaction_key: bytes, group_id: str, tx_id: str) -> bytes:
     """
     Derive a group-specific key from transaction key using HKDF
     This ensures different groups get different keys even for same transaction
     """
-    kdf = HKDF(
+    prk = hmac.new(_HKDF_ZERO_SALT, transaction_key, hashlib.sha256).digest()
+    return _expand_group_key(prk, group_id, tx_id)
+
+
+def derive_group_keys(transaction_key: bytes, group_ids, tx_id: str) -> Dict[str, bytes]:
+    """
+    Derive group-specific keys for many groups of one transaction
+    The HKDF extract step runs once; each group only pays one expand
+    """
+    prk = hmac.new(_HKDF_ZERO_SALT, transaction_key, hashlib.sha256).digest()
+    return {
+        group_id: _expand_group_key(prk, group_id, tx_id)
+        for group_id in group_ids
+    }
+
+
+def _expand_group_key(prk: bytes, group_id: str, tx_id: str) -> bytes:
+    """HKDF-Expand step of the group key derivation"""
+    info = b"group:" + group_id.encode() + b":tx:" + tx_id.encode()
+    return HKDFExpand(
         algorithm=hashes.SHA256(),
         length=32,
-        salt=None,
-        info=f"group:{group_id}:tx:{tx_id}".encode('utf-8'),
-        backend=default_backend()
-    )
-    return kdf.derive(transaction_key)
+        info=info
+    ).derive(prk)
 
 
 def serialize_private_key(private_key) -> bytes:
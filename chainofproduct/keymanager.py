@@ -5,18 +5,60 @@ Key management for companies and users
 
 import os
 import json
-import base64
+import binascii
+from functools import partial
 from pathlib import Path
 from typing import Dict, Any, Tuple
 from . import crypto
 
+# Direct binascii bindings (skip the base64 module's Python wrapper)
+_b64e = partial(binascii.b2a_base64, newline=False)
+_b64d = binascii.a2b_base64
+
+
+def _write_secret(path, data: bytes) -> None:
+    """
+    Write a private key in a single syscall with owner-only permissions
+    (0600 is applied at open time, not left to the umask)
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.fchmod(fd, 0o600)  # also fix mode when overwriting an existing file
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def _append_bytes(path, data: bytes) -> None:
+    """Append to a file with a single write syscall (no buffered io stack)"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def _read_raw(path) -> bytes:
+    """Read a small fixed-size key file without the buffered io stack"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, 64)
+    finally:
+        os.close(fd)
+
 
 class KeyManager:
     """Manages cryptographic keys for companies"""
     
+    __slots__ = ("storage_dir", "_sign_priv_cache", "_enc_priv_cache")
+    
     def __init__(self, storage_dir: str = "keys"):
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(exist_ok=True, parents=True)
+        # Deserialized private keys, cached per company (key loads are
+        # on the protect/unprotect hot path)
+        self._sign_priv_cache = {}
+        self._enc_priv_cache = {}
     
     def generate_company_keys(self, company_name: str) -> Dict[str, Any]:
         """
@@ -33,53 +75,77 @@ class KeyManager:
         company_dir = self.storage_dir / company_name
         company_dir.mkdir(exist_ok=True, parents=True)
         
-        with open(company_dir / "signing_private.key", "wb") as f:
-            f.write(crypto.serialize_private_key(sign_private))
+        _write_secret(company_dir / "signing_private.key",
+                      crypto.serialize_private_key(sign_private))
+        _write_secret(company_dir / "encryption_private.key",
+                      crypto.serialize_private_key(enc_private))
         
-        with open(company_dir / "encryption_private.key", "wb") as f:
-            f.write(crypto.serialize_private_key(enc_private))
+        # Also persist the public halves so export_public_keys can read
+        # them back without re-deriving the Curve25519 points
+        (company_dir / "signing_public.key").write_bytes(
+            crypto.serialize_public_key(sign_public))
+        (company_dir / "encryption_public.key").write_bytes(
+            crypto.serialize_public_key(enc_public))
         
         # Return public keys for registration
         return {
             "company_name": company_name,
-            "signing_public_key": base64.b64encode(crypto.serialize_public_key(sign_public)).decode('utf-8'),
-            "encryption_public_key": base64.b64encode(crypto.serialize_public_key(enc_public)).decode('utf-8')
+            "signing_public_key": _b64e(crypto.serialize_public_key(sign_public)).decode(),
+            "encryption_public_key": _b64e(crypto.serialize_public_key(enc_public)).decode()
         }
     
     def load_signing_private_key(self, company_name: str):
-        """Load signing private key for a company"""
+        """Load signing private key for a company (cached after first load)"""
+        cached = self._sign_priv_cache.get(company_name)
+        if cached is not None:
+            return cached
+
         key_path = self.storage_dir / company_name / "signing_private.key"
         if not key_path.exists():
             raise FileNotFoundError(f"Signing private key not found for {company_name}")
         
-        with open(key_path, "rb") as f:
-            key_bytes = f.read()
-        
-        return crypto.deserialize_signing_private_key(key_bytes)
+        key = crypto.deserialize_signing_private_key(_read_raw(key_path))
+        self._sign_priv_cache[company_name] = key
+        return key
     
     def load_encryption_private_key(self, company_name: str):
-        """Load encryption private key for a company"""
+        """Load encryption private key for a company (cached after first load)"""
+        cached = self._enc_priv_cache.get(company_name)
+        if cached is not None:
+            return cached
+
         key_path = self.storage_dir / company_name / "encryption_private.key"
         if not key_path.exists():
             raise FileNotFoundError(f"Encryption private key not found for {company_name}")
         
-        with open(key_path, "rb") as f:
-            key_bytes = f.read()
-        
-        return crypto.deserialize_encryption_private_key(key_bytes)
+        key = crypto.deserialize_encryption_private_key(_read_raw(key_path))
+        self._enc_priv_cache[company_name] = key
+        return key
     
     def export_public_keys(self, company_name: str) -> Dict[str, str]:
-        """Export public keys for a company (reconstructed from private keys)"""
-        sign_private = self.load_signing_private_key(company_name)
-        enc_private = self.load_encryption_private_key(company_name)
+        """Export public keys for a company"""
+        company_dir = self.storage_dir / company_name
+        sign_pub_path = company_dir / "signing_public.key"
+        enc_pub_path = company_dir / "encryption_public.key"
         
-        sign_public = sign_private.public_key()
-        enc_public = enc_private.public_key()
+        if sign_pub_path.exists() and enc_pub_path.exists():
+            # Fast path: read the stored public halves directly
+            sign_pub_bytes = _read_raw(sign_pub_path)
+            enc_pub_bytes = _read_raw(enc_pub_path)
+        else:
+            # Keys generated before public halves were persisted:
+            # derive from the private keys and store for next time
+            sign_private = self.load_signing_private_key(company_name)
+            enc_private = self.load_encryption_private_key(company_name)
+            sign_pub_bytes = crypto.serialize_public_key(sign_private.public_key())
+            enc_pub_bytes = crypto.serialize_public_key(enc_private.public_key())
+            sign_pub_path.write_bytes(sign_pub_bytes)
+            enc_pub_path.write_bytes(enc_pub_bytes)
         
         return {
             "company_name": company_name,
-            "signing_public_key": base64.b64encode(crypto.serialize_public_key(sign_public)).decode('utf-8'),
-            "encryption_public_key": base64.b64encode(crypto.serialize_public_key(enc_public)).decode('utf-8')
+            "signing_public_key": _b64e(sign_pub_bytes).decode(),
+            "encryption_public_key": _b64e(enc_pub_bytes).decode()
         }
     
     def list_companies(self) -> list:
@@ -95,32 +161,116 @@ class PublicKeyStore:
     """
     Stores public keys of other companies
     In production, this would query the Application Server
+
+    Parsed Ed25519/X25519 key objects are memoized per company, so
+    repeated verifications against the same seller/buyer skip the
+    decode and point-decompression cost; add_company invalidates the
+    affected entries
     """
     
+    __slots__ = ("storage_file", "keys", "_sign_pub_cache", "_enc_pub_cache",
+                 "_raw", "_pending", "_batching", "epoch")
+    
     def __init__(self, storage_file: str = "public_keys.json"):
         self.storage_file = Path(storage_file)
         self.keys = self._load()
+        # Base64 is decoded once at load; lookups work from raw bytes.
+        # A corrupt entry only disables that company, not the whole store
+        self._raw = {}
+        for name, entry in self.keys.items():
+            try:
+                self._raw[name] = (_b64d(entry["signing_public_key"]),
+                                   _b64d(entry["encryption_public_key"]))
+            except (binascii.Error, KeyError):
+                print(f"Warning: Invalid public key data for {name}, skipping")
+        # Deserialized public key objects, cached per company
+        self._sign_pub_cache = {}
+        self._enc_pub_cache = {}
+        # Bumped on every mutation; callers caching verification results
+        # mix it into their keys so store changes invalidate them
+        self.epoch = 0
+        # Batching state: inside a `with store:` block, appended records
+        # are buffered and flushed in one write when the block exits
+        self._pending = []
+        self._batching = 0
+
+    def __enter__(self):
+        self._batching += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._batching -= 1
+        if self._batching == 0 and self._pending:
+            _append_bytes(self.storage_file, "".join(self._pending).encode())
+            self._pending = []
     
     def _load(self) -> Dict[str, Any]:
-        """Load stored public keys"""
-        if self.storage_file.exists():
-            with open(self.storage_file, 'r') as f:
-                return json.load(f)
-        return {}
+        """
+        Load stored public keys
+        The store is newline-delimited JSON, one record per add; the last
+        record per company wins. Legacy single-dict files are still read
+        (compact() rewrites them in the new format)
+        """
+        if not self.storage_file.exists():
+            return {}
+        text = self.storage_file.read_bytes().decode()
+        if not text.strip():
+            return {}
+
+        # Legacy format: one pretty-printed dict of company -> keys
+        # (an NDJSON record parses too, but has a string company_name
+        # value). Rewrite the file in the new format right away -
+        # appending NDJSON lines to a legacy file would leave it
+        # unparseable on the next load
+        try:
+            legacy = json.loads(text)
+            if isinstance(legacy, dict) and all(
+                    isinstance(value, dict) for value in legacy.values()):
+                lines = [
+                    json.dumps({"company_name": name, **entry}) + "\n"
+                    for name, entry in legacy.items()
+                ]
+                self.storage_file.write_bytes("".join(lines).encode())
+                return legacy
+        except json.JSONDecodeError:
+            pass
+
+        keys = {}
+        for line in text.splitlines():
+            if line.strip():
+                record = json.loads(line)
+                keys[record["company_name"]] = {
+                    "signing_public_key": record["signing_public_key"],
+                    "encryption_public_key": record["encryption_public_key"]
+                }
+        return keys
     
-    def _save(self):
-        """Save public keys to disk"""
-        with open(self.storage_file, 'w') as f:
-            json.dump(self.keys, f, indent=2)
+    def compact(self):
+        """Rewrite the store with one record per company (drops stale lines)"""
+        lines = [
+            json.dumps({"company_name": name, **entry}) + "\n"
+            for name, entry in self.keys.items()
+        ]
+        self.storage_file.write_bytes("".join(lines).encode())
     
     def add_company(self, company_data: Dict[str, str]):
-        """Add or update public keys for a company"""
+        """Add or update public keys for a company (O(1) append)"""
         company_name = company_data["company_name"]
-        self.keys[company_name] = {
+        entry = {
             "signing_public_key": company_data["signing_public_key"],
             "encryption_public_key": company_data["encryption_public_key"]
         }
-        self._save()
+        self.keys[company_name] = entry
+        self.epoch += 1
+        self._raw[company_name] = (_b64d(entry["signing_public_key"]),
+                                   _b64d(entry["encryption_public_key"]))
+        self._sign_pub_cache.pop(company_name, None)
+        self._enc_pub_cache.pop(company_name, None)
+        line = json.dumps({"company_name": company_name, **entry}) + "\n"
+        if self._batching:
+            self._pending.append(line)
+        else:
+            _append_bytes(self.storage_file, line.encode())
     
     def get_company(self, company_name: str) -> Dict[str, str]:
         """Get public keys for a company"""
@@ -129,17 +279,44 @@ class PublicKeyStore:
         return self.keys[company_name]
     
     def get_signing_public_key(self, company_name: str):
-        """Get signing public key object for a company"""
-        data = self.get_company(company_name)
-        key_bytes = base64.b64decode(data["signing_public_key"])
-        return crypto.deserialize_signing_public_key(key_bytes)
+        """Get signing public key object for a company (cached)"""
+        cached = self._sign_pub_cache.get(company_name)
+        if cached is not None:
+            return cached
+        if company_name not in self._raw:
+            raise KeyError(f"Public keys not found for {company_name}")
+        key = crypto.deserialize_signing_public_key(self._raw[company_name][0])
+        self._sign_pub_cache[company_name] = key
+        return key
     
     def get_encryption_public_key(self, company_name: str):
-        """Get encryption public key object for a company"""
-        data = self.get_company(company_name)
-        key_bytes = base64.b64decode(data["encryption_public_key"])
-        return crypto.deserialize_encryption_public_key(key_bytes)
+        """Get encryption public key object for a company (cached)"""
+        cached = self._enc_pub_cache.get(company_name)
+        if cached is not None:
+            return cached
+        if company_name not in self._raw:
+            raise KeyError(f"Public keys not found for {company_name}")
+        key = crypto.deserialize_encryption_public_key(self._raw[company_name][1])
+        self._enc_pub_cache[company_name] = key
+        return key
     
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Materialize parsed signing keys for every known company
+        The returned plain dict can be handed to check()/check_batch()
+        in place of the store, collapsing per-document lookups into one
+        up-front pass for a whole audit sweep
+        """
+        snapshot = {}
+        for name in self.keys:
+            try:
+                snapshot[name] = self.get_signing_public_key(name)
+            except (KeyError, ValueError):
+                # Entries with missing or malformed key material don't
+                # take down the whole sweep
+                continue
+        return snapshot
+
     def list_companies(self) -> list:
         """List all companies with stored public keys"""
         return list(self.keys.keys())
\ No newline at end of file
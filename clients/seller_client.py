@@ -6,6 +6,7 @@ Seller client for creating and managing transactions
 import sys
 import json
 import requests
+from requests.adapters import HTTPAdapter
 import os
 from pathlib import Path
 from typing import Optional
@@ -27,6 +28,16 @@ class SellerClient:
         self.group_server_url = group_server_url or os.getenv("GROUP_SERVER_URL", "http://localhost:8002")
         self.key_manager = KeyManager()
         self.public_key_store = PublicKeyStore()
+        # Persistent session: keep-alive reuses one connection across
+        # the client's sequence of server calls
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+    
+    def close(self):
+        """Release the pooled HTTP connections"""
+        self._session.close()
     
     def register(self):
         """Register seller with application server"""
@@ -40,7 +51,7 @@ class SellerClient:
             public_keys = self.key_manager.generate_company_keys(self.seller_name)
         
         # Register with server
-        response = requests.post(
+        response = self._session.post(
             f"{self.app_server_url}/register_company",
             json=public_keys
         )
@@ -90,7 +101,7 @@ class SellerClient:
         
         # Upload to server
         print(f"Uploading to application server...")
-        response = requests.post(
+        response = self._session.post(
             f"{self.app_server_url}/transactions",
             json={"protected_document": protected_doc}
         )
@@ -109,7 +120,7 @@ class SellerClient:
         print(f"\n=== Verifying Shares for Transaction {transaction_id} ===")
         
         # Get share records
-        response = requests.get(
+        response = self._session.get(
             f"{self.app_server_url}/transactions/{transaction_id}/shares"
         )
         
@@ -124,7 +135,7 @@ class SellerClient:
             print(f"  - {record['shared_by']} → {record['shared_with']} at {record['timestamp']}")
         
         # Get group share records
-        response = requests.get(
+        response = self._session.get(
             f"{self.app_server_url}/transactions/{transaction_id}/group_shares"
         )
         
@@ -3,19 +3,37 @@ clients/third_party_client.py
 Third-party client for accessing shared transactions
 """
 
+import io
 import sys
-import json
+import hashlib
+import orjson
 import requests
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
 from typing import Optional
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from chainofproduct.library import unprotect, check
+from chainofproduct.library import unprotect, check, check_batch
 from chainofproduct.keymanager import KeyManager, PublicKeyStore
 
+# Pre-assembled so the success path costs one format + one write
+_TX_TEMPLATE = (
+    "  ID: {id}\n"
+    "  Timestamp: {timestamp}\n"
+    "  Seller: {seller}\n"
+    "  Buyer: {buyer}\n"
+    "  Product: {product}\n"
+    "  Units: {units:,}\n"
+    "  Amount: ${amount:,}\n"
+)
+
 
 class ThirdPartyClient:
     """Client for third-party access to transactions"""
@@ -25,6 +43,23 @@ class ThirdPartyClient:
         self.app_server_url = app_server_url or os.getenv("APP_SERVER_URL", "http://localhost:8001")
         self.key_manager = KeyManager()
         self.public_key_store = PublicKeyStore()
+        # Persistent session: keep-alive amortizes handshakes across the
+        # register / access / audit sequence, with light retry on blips
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                              max_retries=Retry(total=2, backoff_factor=0.1))
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        # requests decompresses transparently; ask for gzip explicitly
+        self._session.headers.update({"Accept-Encoding": "gzip"})
+        # Verification results memoized per document hash; re-auditing
+        # the same byte-identical document skips both Ed25519 verifies.
+        # The store epoch in the key invalidates on key changes
+        self._verify_cache = OrderedDict()
+    
+    def close(self):
+        """Release the pooled HTTP connections"""
+        self._session.close()
     
     def register(self):
         """Register third party with application server"""
@@ -38,7 +73,7 @@ class ThirdPartyClient:
             public_keys = self.key_manager.generate_company_keys(self.company_name)
         
         # Register with server
-        response = requests.post(
+        response = self._session.post(
             f"{self.app_server_url}/register_company",
             json=public_keys
         )
@@ -53,22 +88,57 @@ class ThirdPartyClient:
             print(f"✗ Registration failed: {response.text}")
             return False
     
+    def _check_cached(self, protected_doc):
+        """check() with an LRU memo keyed on the document hash"""
+        cache_key = (self.public_key_store.epoch,
+                     hashlib.sha256(orjson.dumps(protected_doc,
+                                                 option=orjson.OPT_SORT_KEYS)).digest())
+        cached = self._verify_cache.get(cache_key)
+        if cached is not None:
+            self._verify_cache.move_to_end(cache_key)
+            return cached
+        verification = check(protected_doc, self.public_key_store)
+        self._verify_cache[cache_key] = verification
+        if len(self._verify_cache) > 4096:
+            self._verify_cache.popitem(last=False)
+        return verification
+    
+    def fetch_and_decrypt(self, transaction_id: int):
+        """
+        Fetch, verify and decrypt a transaction without any output
+        This is the hot path for bulk audit loops; returns the
+        decrypted transaction dict, or None when the document fails
+        verification or the caller has no access
+        """
+        response = self._session.get(f"{self.app_server_url}/transactions/{transaction_id}")
+        if response.status_code != 200:
+            return None
+        
+        protected_doc = orjson.loads(response.content)["transaction"]["protected_document"]
+        if not self._check_cached(protected_doc)["valid"]:
+            return None
+        
+        try:
+            return unprotect(protected_doc, self.company_name, self.key_manager)["transaction"]
+        except Exception:
+            return None
+    
     def access_transaction(self, transaction_id: int):
         """
-        Access a transaction (if authorized)
+        Access a transaction (if authorized), with demo output
         Demonstrates SR1 (Confidentiality) - only authorized parties can decrypt
         """
         print(f"\n=== Accessing Transaction {transaction_id} ===")
         
         # Retrieve transaction
         print(f"Retrieving transaction from server...")
-        response = requests.get(f"{self.app_server_url}/transactions/{transaction_id}")
+        response = self._session.get(f"{self.app_server_url}/transactions/{transaction_id}")
         
         if response.status_code != 200:
             print(f"✗ Failed to retrieve transaction: {response.text}")
             return None
         
-        data = response.json()
+        data = orjson.loads(response.content)
         protected_doc = data["transaction"]["protected_document"]
         
         # Verify transaction integrity (SR2, SR3)
@@ -99,13 +169,7 @@ class ThirdPartyClient:
             print(f"✓ Access granted! Transaction decrypted successfully")
             print(f"  Access method: {result['access_method']}")
             print(f"\nTransaction Details:")
-            print(f"  ID: {transaction_data['id']}")
-            print(f"  Timestamp: {transaction_data['timestamp']}")
-            print(f"  Seller: {transaction_data['seller']}")
-            print(f"  Buyer: {transaction_data['buyer']}")
-            print(f"  Product: {transaction_data['product']}")
-            print(f"  Units: {transaction_data['units']:,}")
-            print(f"  Amount: ${transaction_data['amount']:,}")
+            sys.stdout.write(_TX_TEMPLATE.format(**transaction_data))
             
             return transaction_data
             
@@ -115,6 +179,88 @@ class ThirdPartyClient:
             print(f"  Only authorized parties can decrypt transactions")
             return None
     
+    def access_transactions(self, transaction_ids: list):
+        """
+        Access many transactions in one sweep
+        Documents are fetched over the pooled session and all their
+        signatures are verified in a single batched pass
+        """
+        print(f"\n=== Accessing {len(transaction_ids)} transactions ===")
+        
+        documents = self._fetch_documents(transaction_ids)
+        
+        ordered_ids = list(documents)
+        verifications = check_batch([documents[i] for i in ordered_ids],
+                                    self.public_key_store)
+        
+        accessible = {}
+        for transaction_id, verification in zip(ordered_ids, verifications):
+            if not verification["valid"]:
+                print(f"✗ Transaction {transaction_id} failed verification")
+                continue
+            try:
+                result = unprotect(documents[transaction_id], self.company_name,
+                                   self.key_manager)
+                accessible[transaction_id] = result["transaction"]
+            except Exception:
+                print(f"✗ Access denied for transaction {transaction_id}")
+        
+        print(f"✓ Decrypted {len(accessible)}/{len(transaction_ids)} transactions")
+        return accessible
+    
+    def _fetch_documents(self, transaction_ids: list) -> dict:
+        """
+        Fetch protected documents, preferring the bulk endpoint (one
+        round-trip); falls back to per-id GETs against older servers
+        """
+        try:
+            response = self._session.post(
+                f"{self.app_server_url}/transactions/bulk",
+                json={"ids": transaction_ids}
+            )
+            if response.status_code == 200:
+                transactions = orjson.loads(response.content)["transactions"]
+                documents = {}
+                for transaction_id in transaction_ids:
+                    entry = transactions.get(str(transaction_id))
+                    if entry is None:
+                        print(f"✗ Could not retrieve transaction {transaction_id}, skipping")
+                        continue
+                    documents[transaction_id] = entry["transaction"]["protected_document"]
+                return documents
+        except Exception as e:
+            print(f"Warning: Bulk fetch failed, falling back: {e}")
+        
+        documents = {}
+        for transaction_id in transaction_ids:
+            response = self._session.get(
+                f"{self.app_server_url}/transactions/{transaction_id}")
+            if response.status_code != 200:
+                print(f"✗ Could not retrieve transaction {transaction_id}, skipping")
+                continue
+            documents[transaction_id] = orjson.loads(response.content)["transaction"]["protected_document"]
+        return documents
+    
+    def audit_range(self, transaction_ids: list):
+        """
+        Verify a whole range of transactions in one sweep
+        The public key store is snapshotted once and every signature in
+        the range goes through a single batched verification; returns
+        transaction_id -> check() result
+        """
+        print(f"\n=== Auditing {len(transaction_ids)} transactions ===")
+        
+        documents = self._fetch_documents(transaction_ids)
+        ordered_ids = list(documents)
+        
+        snapshot = self.public_key_store.snapshot()
+        verifications = check_batch([documents[i] for i in ordered_ids], snapshot)
+        
+        results = dict(zip(ordered_ids, verifications))
+        valid = sum(1 for verification in verifications if verification["valid"])
+        print(f"✓ {valid}/{len(ordered_ids)} transactions verified")
+        return results
+    
     def audit_shares(self, transaction_id: int):
         """
         Audit who has access to a transaction
@@ -123,23 +269,23 @@ class ThirdPartyClient:
         print(f"\n=== Auditing Shares for Transaction {transaction_id} ===")
         
         # Get individual share records
-        response = requests.get(
+        response = self._session.get(
             f"{self.app_server_url}/transactions/{transaction_id}/shares"
         )
         
         if response.status_code == 200:
-            share_records = response.json()["share_records"]
+            share_records = orjson.loads(response.content)["share_records"]
             print(f"\nIndividual Share Records: {len(share_records)}")
             for record in share_records:
                 print(f"  {record['timestamp']}: {record['shared_by']} → {record['shared_with']}")
         
         # Get group share records
-        response = requests.get(
+        response = self._session.get(
             f"{self.app_server_url}/transactions/{transaction_id}/group_shares"
         )
         
         if response.status_code == 200:
-            group_records = response.json()["group_share_records"]
+            group_records = orjson.loads(response.content)["group_share_records"]
             print(f"\nGroup Share Records: {len(group_records)}")
             for record in group_records:
                 print(f"  {record['timestamp']}: {record['shared_by']} → Group {record['group_id']}")
@@ -148,37 +294,87 @@ class ThirdPartyClient:
         print(f"  All disclosures are auditable and verifiable")
 
 
-def demo_third_party():
-    """Demo third-party operations"""
-    print("=" * 60)
-    print("THIRD PARTY CLIENT DEMO")
-    print("=" * 60)
+class _ThreadDemuxWriter:
+    """
+    Routes writes to a per-thread buffer when one is registered,
+    falling back to the real stream. Lets independent demo workflows
+    run concurrently without interleaving their output
+    """
     
-    # Demo as authorized third party
-    auditor = ThirdPartyClient("Auditor Corp")
-    auditor.register()
-    
-    print(f"\n--- Attempting access as AUTHORIZED third party ---")
-    transaction = auditor.access_transaction(123)
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._buffers = {}
     
-    if transaction:
-        print(f"\n✓ Successfully accessed transaction as authorized party")
+    def capture(self):
+        buffer = io.StringIO()
+        self._buffers[threading.get_ident()] = buffer
+        return buffer
     
-    # Audit share records
-    auditor.audit_shares(123)
-    
-    print("\n" + "=" * 60)
+    def write(self, text):
+        self._buffers.get(threading.get_ident(), self._fallback).write(text)
     
-    # Demo as unauthorized third party
+    def flush(self):
+        self._fallback.flush()
+
+
+def _run_authorized(writer):
+    writer.capture()
+    auditor = ThirdPartyClient("Auditor Corp")
+    try:
+        auditor.register()
+        
+        print(f"\n--- Attempting access as AUTHORIZED third party ---")
+        transaction = auditor.access_transaction(123)
+        
+        if transaction:
+            print(f"\n✓ Successfully accessed transaction as authorized party")
+        
+        # Audit share records
+        auditor.audit_shares(123)
+    finally:
+        auditor.close()
+    return writer._buffers[threading.get_ident()].getvalue()
+
+
+def _run_unauthorized(writer):
+    writer.capture()
     print(f"\n--- Attempting access as UNAUTHORIZED third party ---")
     unauthorized = ThirdPartyClient("Random Company")
-    unauthorized.register()
+    try:
+        unauthorized.register()
+        
+        transaction = unauthorized.access_transaction(123)
+        
+        if not transaction:
+            print(f"\n✓ Access correctly denied to unauthorized party")
+            print(f"  This demonstrates proper enforcement of SR1 (Confidentiality)")
+    finally:
+        unauthorized.close()
+    return writer._buffers[threading.get_ident()].getvalue()
+
+
+def demo_third_party():
+    """Demo third-party operations (both workflows run concurrently)"""
+    print("=" * 60)
+    print("THIRD PARTY CLIENT DEMO")
+    print("=" * 60)
     
-    transaction = unauthorized.access_transaction(123)
+    # The two workflows are independent HTTP sequences; run them in
+    # parallel and flush each one's buffered output when both finish
+    writer = _ThreadDemuxWriter(sys.stdout)
+    original_stdout = sys.stdout
+    sys.stdout = writer
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            authorized = pool.submit(_run_authorized, writer)
+            unauthorized = pool.submit(_run_unauthorized, writer)
+            outputs = [authorized.result(), unauthorized.result()]
+    finally:
+        sys.stdout = original_stdout
     
-    if not transaction:
-        print(f"\n✓ Access correctly denied to unauthorized party")
-        print(f"  This demonstrates proper enforcement of SR1 (Confidentiality)")
+    print(outputs[0])
+    print("\n" + "=" * 60)
+    print(outputs[1])
 
 
 if __name__ == "__main__":
@@ -2,13 +2,23 @@
 groupserver/main.py
 Group Server - Runs on VM2 alongside Application Server
 Uses same PostgreSQL database on VM3
+
+All endpoints are async and run on the event loop against the shared
+async psycopg connection pool; no handler occupies a threadpool worker
+for the duration of a database round-trip
 """
 
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, constr
 from typing import List
 import uvicorn
+import os
 import sys
 from pathlib import Path
 
@@ -17,12 +27,41 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.db import Database
 
+# Database connection (shared with application server, connects to VM3)
+db = Database()
+
+# Group membership barely changes on the timescale of transaction
+# processing; cache member lists briefly and invalidate on writes
+_group_cache = {}
+_GROUP_CACHE_TTL = 15.0
+
+
+def _cached_members(group_id: str):
+    entry = _group_cache.get(group_id)
+    if entry and time.monotonic() - entry[0] < _GROUP_CACHE_TTL:
+        return entry[1]
+    return None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the async connection pool for the process lifetime"""
+    await db.connect()
+    yield
+    await db.close()
+
+
 app = FastAPI(
     title="ChainOfProduct Group Server",
     description="Dynamic group membership management",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+# Compress larger responses (bulk member listings)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -32,28 +71,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Database connection (shared with application server, connects to VM3)
-db = Database()
+# Reject malformed ids before they reach the database
+GroupId = constr(min_length=1, max_length=64, pattern=r'^[A-Za-z0-9_-]+$')
 
 
 class GroupCreate(BaseModel):
     """Create group request"""
-    group_id: str
+    model_config = ConfigDict(extra='forbid', frozen=True)
+    group_id: GroupId
     members: List[str] = []
 
 
 class MemberAdd(BaseModel):
     """Add member request"""
+    model_config = ConfigDict(extra='forbid', frozen=True)
     member: str
 
 
 class MemberRemove(BaseModel):
     """Remove member request"""
+    model_config = ConfigDict(extra='forbid', frozen=True)
     member: str
 
 
+class MembersBulkAdd(BaseModel):
+    """Bulk add members request"""
+    model_config = ConfigDict(extra='forbid', frozen=True)
+    members: List[str]
+
+
+class GroupMembersQuery(BaseModel):
+    """Bulk member lookup request"""
+    model_config = ConfigDict(extra='forbid', frozen=True)
+    group_ids: List[GroupId]
+
+
 @app.get("/")
-def root():
+async def root():
     """Health check"""
     return {
         "service": "ChainOfProduct Group Server",
@@ -64,28 +118,25 @@ def root():
 
 
 @app.post("/groups/create", status_code=status.HTTP_201_CREATED)
-def create_group(group: GroupCreate):
+async def create_group(group: GroupCreate):
     """Create a new partner group"""
     try:
-        # Check if group already exists
-        if db.group_exists(group.group_id):
+        # Atomic insert; None means the group already exists
+        group_row = await db.create_group(group.group_id)
+        if group_row is None:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail=f"Group {group.group_id} already exists"
             )
-        
-        # Create group
-        group_db_id = db.create_group(group.group_id)
-        
-        # Add initial members
-        for member in group.members:
-            try:
-                db.add_group_member(group.group_id, member)
-            except Exception as e:
-                print(f"Warning: Could not add member {member}: {e}")
+
+        # Seed initial members in a single bulk insert
+        try:
+            await db.add_group_members(group.group_id, group.members)
+        except Exception as e:
+            print(f"Warning: Could not add initial members: {e}")
         
         return {
-            "id": group_db_id,
+            "id": group_row["id"],
             "group_id": group.group_id,
             "members": group.members,
             "message": "Group created successfully"
@@ -101,33 +152,32 @@ def create_group(group: GroupCreate):
 
 
 @app.post("/groups/{group_id}/add_member")
-def add_member(group_id: str, member: MemberAdd):
+async def add_member(group_id: str, member: MemberAdd):
     """Add a member to a group"""
     try:
-        # Check if group exists
-        if not db.group_exists(group_id):
+        # One statement checks group existence and inserts; the happy
+        # path costs a single round-trip
+        outcome, member_row = await db.add_group_member_checked(group_id, member.member)
+        
+        if outcome == "no_group":
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Group {group_id} not found"
             )
+        if outcome == "duplicate":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Member {member.member} already in group {group_id}"
+            )
         
-        # Add member
-        try:
-            member_id = db.add_group_member(group_id, member.member)
-            return {
-                "id": member_id,
-                "group_id": group_id,
-                "member": member.member,
-                "message": "Member added successfully"
-            }
-        except Exception as e:
-            # Member might already exist
-            if "UNIQUE constraint" in str(e) or "duplicate key" in str(e):
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail=f"Member {member.member} already in group {group_id}"
-                )
-            raise
+        _group_cache.pop(group_id, None)
+        return {
+            "id": member_row["id"],
+            "group_id": group_id,
+            "member": member.member,
+            "added_at": member_row["added_at"],
+            "message": "Member added successfully"
+        }
         
     except HTTPException:
         raise
@@ -138,19 +188,49 @@ def add_member(group_id: str, member: MemberAdd):
         )
 
 
+@app.post("/groups/{group_id}/members:bulk")
+async def add_members_bulk(group_id: str, request: MembersBulkAdd):
+    """Add many members to a group in a single database round-trip"""
+    try:
+        # Check if group exists
+        if not await db.group_exists(group_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Group {group_id} not found"
+            )
+
+        added = await db.add_group_members(group_id, request.members)
+        _group_cache.pop(group_id, None)
+
+        return {
+            "group_id": group_id,
+            "requested": len(request.members),
+            "added": added,
+            "message": "Members added successfully"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to add members: {str(e)}"
+        )
+
+
 @app.post("/groups/{group_id}/remove_member")
-def remove_member(group_id: str, member: MemberRemove):
+async def remove_member(group_id: str, member: MemberRemove):
     """Remove a member from a group"""
     try:
         # Check if group exists
-        if not db.group_exists(group_id):
+        if not await db.group_exists(group_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Group {group_id} not found"
             )
         
         # Remove member
-        success = db.remove_group_member(group_id, member.member)
+        success = await db.remove_group_member(group_id, member.member)
         
         if not success:
             raise HTTPException(
@@ -158,6 +238,7 @@ def remove_member(group_id: str, member: MemberRemove):
                 detail=f"Member {member.member} not found in group {group_id}"
             )
         
+        _group_cache.pop(group_id, None)
         return {
             "group_id": group_id,
             "member": member.member,
@@ -173,22 +254,42 @@ def remove_member(group_id: str, member: MemberRemove):
         )
 
 
+@app.post("/groups/members")
+async def get_members_bulk(query: GroupMembersQuery):
+    """
+    Get member lists for many groups in a single request/query
+    Used by protect() when a transaction discloses to several groups
+    """
+    try:
+        members = await db.get_group_members_bulk(query.group_ids)
+        return {
+            "members": members,
+            "count": len(members)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get members: {str(e)}"
+        )
+
+
 @app.get("/groups/{group_id}/members")
-def get_members(group_id: str):
+async def get_members(group_id: str):
     """
     Get all members of a group
     Used by Application Server when processing group disclosures
     """
     try:
-        # Check if group exists
-        if not db.group_exists(group_id):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Group {group_id} not found"
-            )
-        
-        # Get members
-        members = db.get_group_members(group_id)
+        members = _cached_members(group_id)
+        if members is None:
+            # One query covers both the existence check and the members
+            members = await db.get_group_with_members(group_id)
+            if members is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Group {group_id} not found"
+                )
+            _group_cache[group_id] = (time.monotonic(), members)
         
         return {
             "group_id": group_id,
@@ -206,18 +307,19 @@ def get_members(group_id: str):
 
 
 @app.get("/groups/{group_id}")
-def get_group(group_id: str):
+async def get_group(group_id: str):
     """Get group information"""
     try:
-        # Check if group exists
-        if not db.group_exists(group_id):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Group {group_id} not found"
-            )
-        
-        # Get members
-        members = db.get_group_members(group_id)
+        members = _cached_members(group_id)
+        if members is None:
+            # One query covers both the existence check and the members
+            members = await db.get_group_with_members(group_id)
+            if members is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Group {group_id} not found"
+                )
+            _group_cache[group_id] = (time.monotonic(), members)
         
         return {
             "group_id": group_id,
@@ -235,10 +337,10 @@ def get_group(group_id: str):
 
 
 @app.get("/groups")
-def list_groups():
+async def list_groups():
     """List all groups"""
     try:
-        groups = db.list_groups()
+        groups = await db.list_groups()
         return {
             "groups": groups,
             "count": len(groups)
@@ -251,10 +353,12 @@ def list_groups():
 
 
 def start_server(host: str = "0.0.0.0", port: int = 8002):
-    """Start the group server"""
+    """Start the group server (multi-worker, uvloop + httptools)"""
     print(f"Starting Group Server on {host}:{port}")
     print(f"Database: PostgreSQL on VM3 (192.168.1.30:5432)")
-    uvicorn.run(app, host=host, port=port)
+    uvicorn.run("groupserver.main:app", host=host, port=port,
+                workers=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))),
+                loop="uvloop", http="httptools", log_level="warning")
 
 
 if __name__ == "__main__":
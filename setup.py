@@ -3,8 +3,21 @@ setup.py
 Package setup configuration
 """
 
+import os
+
 from setuptools import setup, find_packages
 
+# Opt-in mypyc compilation of the protect/check/unprotect glue
+# (CHAINOFPRODUCT_MYPYC=1). The interpreted module is always shipped,
+# so environments without mypyc lose nothing.
+ext_modules = []
+if os.getenv("CHAINOFPRODUCT_MYPYC") == "1":
+    try:
+        from mypyc.build import mypycify
+        ext_modules = mypycify(["chainofproduct/library.py"])
+    except ImportError:
+        pass
+
 setup(
     name="chainofproduct",
     version="1.0.0",
@@ -12,14 +25,23 @@ setup(
     author="Your Name",
     author_email="your.email@example.com",
     packages=find_packages(),
+    ext_modules=ext_modules,
     install_requires=[
         "cryptography>=41.0.0",
         "fastapi>=0.104.0",
         "uvicorn[standard]>=0.24.0",
-        "pydantic>=2.0.0",
+        "pydantic>=2.5,<3.0",
+        "pydantic-core>=2.10",
         "requests>=2.31.0",
         "python-multipart>=0.0.6",
+        "orjson>=3.9.0",
+        "psycopg[binary,pool]>=3.1",
+        "cachetools>=5.3.0",
+        "cbor2>=5.5.0",
     ],
+    extras_require={
+        "speed": ["pybase64>=1.3"],
+    },
     entry_points={
         "console_scripts": [
             "cop=chainofproduct.cli:main",